@@ -2,38 +2,75 @@ import os
 import webbrowser
 import subprocess
 import platform
-import json
-import smtplib
-import imaplib
-import email
-from email.header import decode_header
-import re
+import threading
 from tts import speak
-from voice_input import listen_command
-import requests
-from bs4 import BeautifulSoup
-
-# Load config
-with open(os.path.join(os.path.dirname(__file__), 'config.json'), 'r') as f:
-    CONFIG = json.load(f)
+from voice_input import listen_command, FOLLOW_UP_TIMEOUT
+# requests, imaplib and smtplib are only imported once an action needs them
+import config
+import metrics
+import http_client
+from http_client import TTLCache, normalize_query
+from extract import extract
 
 SYSTEM = platform.system().lower()
 
+SEARCH_URL = "https://www.google.com/search"
+
+# Spoken answers keyed by normalized query; weather goes stale much sooner
+ANSWER_CACHE = TTLCache(maxsize=256, ttl=6 * 3600)
+WEATHER_CACHE = TTLCache(maxsize=64, ttl=10 * 60)
+
+# Fixed responses, pre-rendered into the TTS audio cache at startup
+GREETING = "Hello! How can I help you today?"
+FALLBACK_PROMPT = "I'm not sure how to help with that. Would you like me to search for it?"
+NO_READ_CREDENTIALS = "I need your email credentials to be configured before I can read your emails."
+NO_SEND_CREDENTIALS = "I need your email credentials to be configured before I can send emails."
+SUBJECT_PROMPT = "What should the subject be?"
+BODY_PROMPT = "And what should the email say?"
+NO_NEW_EMAILS = "It looks like you have no new emails."
+NO_DIRECT_ANSWER = "I couldn't find a direct answer, but here are the search results."
+SEARCH_TROUBLE = "I'm having trouble searching right now. Please try again later."
+STOPPED = "Okay, I've stopped."
+TIMED_OUT = "Sorry, that's taking too long, so I've given up on it."
+COMMON_PHRASES = (
+    GREETING,
+    FALLBACK_PROMPT,
+    NO_READ_CREDENTIALS,
+    NO_SEND_CREDENTIALS,
+    SUBJECT_PROMPT,
+    BODY_PROMPT,
+    NO_NEW_EMAILS,
+    NO_DIRECT_ANSWER,
+    SEARCH_TROUBLE,
+    STOPPED,
+    TIMED_OUT,
+)
+
+# Intents that ask follow-up questions; they read the command queue, so
+# main runs them itself instead of on the action workers
+INTERACTIVE_INTENTS = {"send_email"}
+# Seconds before a background action is given up on (default: executor.ACTION_TIMEOUT)
+ACTION_TIMEOUTS = {
+    "answer_question": 15,
+    "get_weather": 15,
+    "read_emails": 30,
+}
+
 # --- Helper functions ---
 def get_app_path(app_name):
-    """Return path for app (OS-detected)."""
-    apps = CONFIG.get("applications", {})
-    # Support dict: {"chrome": {"windows": path, "linux": path}}
-    info = apps.get(app_name.lower())
-    if isinstance(info, dict):
-        return info.get(SYSTEM)
-    return info
+    """Return path for app (OS-detected, resolved when config.json is loaded)."""
+    return config.current().app_path(app_name)
 
 def open_application(app_name):
-    app_path = get_app_path(app_name)
+    settings = config.current()
+    app_path = settings.app_path(app_name)
     if not app_path:
         speak(f"I can't find the path for {app_name} on this computer. You can configure it in the config file.")
         return False
+    # os.startfile also knows registered app names that aren't on PATH
+    if settings.canonical(app_name) in settings.missing_apps and SYSTEM != "windows":
+        speak(f"{app_name} doesn't seem to be installed at {app_path}. You can fix the path in the config file.")
+        return False
     try:
         if SYSTEM == "windows":
             os.startfile(app_path)
@@ -49,8 +86,7 @@ def open_application(app_name):
         return False
 
 def open_website(site_name):
-    urls = CONFIG.get("websites", {})
-    url = urls.get(site_name.lower())
+    url = config.current().site_url(site_name)
     if not url:
         speak(f"I don't have a URL for {site_name}. You can add it to the config file.")
         return False
@@ -58,6 +94,16 @@ def open_website(site_name):
     speak(f"Alright, opening {site_name}.")
     return True
 
+def open_by_name(name):
+    """Open the application or website whose name is closest to what was heard."""
+    kind, target = config.current().match(name)
+    if kind == "application":
+        return open_application(target)
+    if kind == "website":
+        return open_website(target)
+    speak(f"I don't know an application or website called {name}.")
+    return False
+
 def google_search(query):
     """Open Google with the given search query."""
     search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
@@ -65,34 +111,55 @@ def google_search(query):
     speak(f"Here is what I found for {query} on Google.")
     return True
 
+_lookups = {}  # normalized query -> Event set when the lookup in flight finishes
+_lookups_lock = threading.Lock()
+
+def _lookup_answer(query):
+    """Return the direct answer or snippet Google shows for query ("" if none), cached."""
+    key = normalize_query(query)
+    while True:
+        answer = ANSWER_CACHE.get(key)
+        if answer is not None:
+            return answer
+        with _lookups_lock:
+            pending = _lookups.get(key)
+            if pending is None:
+                _lookups[key] = threading.Event()
+                break
+        # A prefetch is already fetching this one; share its result
+        pending.wait()
+    try:
+        response = http_client.get(SEARCH_URL, params={"q": query})
+        # Direct answer if there is one, else a snippet (see "extractors" in config.json)
+        answer = extract(response.text, config.current().extractors["answer"])["answer"] or ""
+        ANSWER_CACHE.set(key, answer)
+        return answer
+    finally:
+        with _lookups_lock:
+            _lookups.pop(key).set()
+
+def prefetch_answer(query):
+    """Warm ANSWER_CACHE for query; failures are left for answer_question to report."""
+    try:
+        _lookup_answer(query)
+    except Exception:
+        pass
+
 def answer_question(query):
     """Search Google and speak the answer."""
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36"
-        }
-        response = requests.get(f"https://www.google.com/search?q={query}", headers=headers)
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Try to find a direct answer
-        answer = soup.find("div", class_="BNeawe iBp4i AP7Wnd")
+        answer = _lookup_answer(query)
         if answer:
-            speak(answer.text)
-            return True
-
-        # If no direct answer, try to find a snippet
-        snippet = soup.find("div", class_="BNeawe s3v9rd AP7Wnd")
-        if snippet:
-            speak(snippet.text)
+            speak(answer)
             return True
 
-        speak("I couldn't find a direct answer, but here are the search results.")
+        speak(NO_DIRECT_ANSWER)
         google_search(query)
         return True
 
     except Exception as e:
         print(e)
-        speak("I'm having trouble searching right now. Please try again later.")
+        speak(SEARCH_TROUBLE)
         return False
 
 
@@ -106,32 +173,38 @@ def play_song_on_youtube(song_name):
     speak(f"Now playing {query} on YouTube.")
     return True
 
+_mailbox = None
+_mail_lock = threading.Lock()  # actions run on several workers
+
+def _mail_server(creds, kind):
+    """host/port/ssl for the "imap" or "smtp" server, where the gmail section overrides them."""
+    return {key: creds[f"{kind}_{key}"] for key in ("host", "port", "ssl") if f"{kind}_{key}" in creds}
+
+def _get_mailbox(creds):
+    """Shared IMAP session, so checks after the first skip connect and login."""
+    global _mailbox
+    from mail import ImapMailbox
+    wanted = dict(user=creds["email"], password=creds["app_password"], **_mail_server(creds, "imap"))
+    with _mail_lock:
+        if _mailbox is None or any(getattr(_mailbox, key) != value for key, value in wanted.items()):
+            if _mailbox is not None:
+                _mailbox.close()  # credentials or server changed in config.json
+            _mailbox = ImapMailbox(**wanted)
+        return _mailbox
+
 def read_emails():
-    creds = CONFIG.get("gmail")
+    creds = config.current().gmail
     if not creds or not creds.get("email") or not creds.get("app_password"):
-        speak("I need your email credentials to be configured before I can read your emails.")
+        speak(NO_READ_CREDENTIALS)
         return False
     try:
-        email_user = creds["email"]
-        email_pass = creds["app_password"]
-        mail = imaplib.IMAP4_SSL("imap.gmail.com")
-        mail.login(email_user, email_pass)
-        mail.select("inbox")
-        status, messages = mail.search(None, "UNSEEN")
-        mail_ids = messages[0].split()
-        if not mail_ids:
-            speak("It looks like you have no new emails.")
+        count, latest = _get_mailbox(creds).unseen(limit=3)
+        if not count:
+            speak(NO_NEW_EMAILS)
             return True
-        speak(f"You have {len(mail_ids)} new emails. Here are the latest ones.")
-        for i in mail_ids[:3]:
-            status, msg_data = mail.fetch(i, "(RFC822)")
-            msg = email.message_from_bytes(msg_data[0][1])
-            subject, encoding = decode_header(msg["Subject"])[0]
-            if isinstance(subject, bytes):
-                subject = subject.decode(encoding or "utf-8")
-            from_ = msg.get("From")
-            speak(f"You have an email from {from_} with the subject: {subject}.")
-        mail.logout()
+        speak(f"You have {count} new emails. Here are the latest ones.")
+        for msg in latest:
+            speak(f"You have an email from {msg.sender} with the subject: {msg.subject}.")
         return True
     except Exception:
         speak("I'm having trouble accessing your emails right now.")
@@ -182,15 +255,16 @@ def delete_file(file_name):
 def get_weather(location):
     """Get the weather for a given location and speak it."""
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36"
-        }
-        response = requests.get(f"https://www.google.com/search?q=weather in {location}", headers=headers)
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        temp = soup.find("div", class_="BNeawe iBp4i AP7Wnd").text
-        condition = soup.find("div", class_="BNeawe tAd8D AP7Wnd").text
-        
+        key = normalize_query(location)
+        weather = WEATHER_CACHE.get(key)
+        if weather is None:
+            response = http_client.get(SEARCH_URL, params={"q": f"weather in {location}"})
+            found = extract(response.text, config.current().extractors["weather"])
+            weather = (found["temperature"] or "", found["condition"] or "")
+            if all(weather):
+                WEATHER_CACHE.set(key, weather)
+        temp, condition = weather
+
         if temp and condition:
             speak(f"The current weather in {location} is {condition} with a temperature of {temp}.")
             return True
@@ -201,28 +275,44 @@ def get_weather(location):
         speak("I'm having trouble getting the weather right now.")
         return False
 
+_outbox = None
+
+def _on_email_result(message, sent):
+    if sent:
+        speak(f"I've sent the email to {message['to']}.")
+    elif message.get("status") == "failed":
+        speak(f"I couldn't send the email to {message['to']} yet. I'll try again later.")
+    else:
+        speak(f"The mail server wouldn't accept the email to {message['to']}.")
+
+def _get_outbox(creds):
+    """Background mail queue; created on first use, or at startup if mail is still spooled."""
+    global _outbox
+    from outbox import Outbox
+    with _mail_lock:
+        if _outbox is None:
+            _outbox = Outbox(creds["email"], creds["app_password"], on_result=_on_email_result,
+                             **_mail_server(creds, "smtp"))
+        elif (_outbox.user, _outbox.password) != (creds["email"], creds["app_password"]):
+            # One Outbox per spool; a second one would deliver the same mail again
+            _outbox.set_credentials(creds["email"], creds["app_password"])
+        return _outbox
+
+def resume_outbox():
+    """Start delivering mail left in the spool by a previous run."""
+    from outbox import SPOOL_PATH
+    creds = config.current().gmail
+    if creds and creds.get("email") and creds.get("app_password") and os.path.exists(SPOOL_PATH):
+        _get_outbox(creds)
+
 def send_email(recipient, subject, body):
-    """Send an email using configured credentials."""
-    creds = CONFIG.get("gmail")
+    """Queue an email for the background sender; it confirms once delivered."""
+    creds = config.current().gmail
     if not creds or not creds.get("email") or not creds.get("app_password"):
-        speak("I need your email credentials to be configured before I can send emails.")
+        speak(NO_SEND_CREDENTIALS)
         return False
     try:
-        email_user = creds["email"]
-        email_pass = creds["app_password"]
-        
-        msg = email.message.EmailMessage()
-        msg.set_content(body)
-        msg['Subject'] = subject
-        msg['From'] = email_user
-        msg['To'] = recipient
-        
-        server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
-        server.login(email_user, email_pass)
-        server.send_message(msg)
-        server.quit()
-        
-        speak(f"I've sent the email to {recipient}.")
+        _get_outbox(creds).send(recipient, subject, body)
         return True
     except Exception:
         speak("I had trouble sending the email.")
@@ -230,70 +320,71 @@ def send_email(recipient, subject, body):
 
 def greet():
     """A simple greeting."""
-    speak("Hello! How can I help you today?")
+    speak(GREETING)
     return True
 
 # --- Main Flexible Command Handler ---
-def handle_command(command):
-    command = command.lower()
-
-    # Greeting
-    if "hello" in command or "hi" in command or "hey" in command:
-        return greet()
+def resolve_command(command):
+    """Return (intent, slots) for a command; intent is None if nothing matches."""
+    # The router is built with each config load and resolves in one pass
+    intent, slots = config.current().router.resolve(command.lower())
+    metrics.mark(metrics.current(), "intent", action=intent or "unknown")
+    return intent, slots
 
-    # Open Applications
-    for app_name in CONFIG.get("applications", {}):
-        if f"open {app_name.lower()}" in command or f"start {app_name.lower()}" in command:
-            return open_application(app_name)
+def is_cancel(command):
+    """True if command is a "stop"/"cancel" on its own."""
+    return bool(command) and config.current().router.resolve(command.lower())[0] == "cancel"
 
-    # Open Websites
-    for site in CONFIG.get("websites", {}):
-        if f"open {site.lower()}" in command or f"go to {site.lower()}" in command:
-            return open_website(site)
+def handle_command(command):
+    intent, slots = resolve_command(command)
+    return run_action(intent, slots, command)
 
-    # Play Song on YouTube
-    if "play" in command and "on youtube" in command:
+def run_action(intent, slots, command):
+    """Carry out a resolved command; False means it wasn't understood."""
+    command = command.lower()
+    if intent == "cancel":
+        return True  # nothing runs in the background when called directly
+    if intent == "greet":
+        return greet()
+    if intent == "open_application":
+        return open_application(slots["app_name"])
+    if intent == "open_website":
+        return open_website(slots["site_name"])
+    if intent == "open_by_name":
+        return open_by_name(slots["name"])
+    if intent == "play_song_on_youtube":
         return play_song_on_youtube(command)
-
-    # Read Emails
-    if "read my email" in command or "check my email" in command:
+    if intent == "read_emails":
         return read_emails()
-
-    # File operations
-    m = re.search(r'create file ([\w_.-]+)', command)
-    if m:
-        return create_file(m.group(1))
-    m = re.search(r'open file ([\w_.-]+)', command)
-    if m:
-        return open_file(m.group(1))
-    m = re.search(r'delete file ([\w_.-]+)', command)
-    if m:
-        return delete_file(m.group(1))
-
-    # Weather
-    m = re.search(r'weather in (.+)', command)
-    if m:
-        return get_weather(m.group(1))
-
-    # Send Email
-    m = re.search(r'send an email to (.+)', command)
-    if m:
-        recipient = m.group(1)
-        speak("What should the subject be?")
-        subject = listen_command()
-        speak("And what should the email say?")
-        body = listen_command()
+    if intent == "create_file":
+        return create_file(slots["file_name"])
+    if intent == "open_file":
+        return open_file(slots["file_name"])
+    if intent == "delete_file":
+        return delete_file(slots["file_name"])
+    if intent == "get_weather":
+        return get_weather(slots["location"])
+    if intent == "send_email":
+        recipient = slots["recipient"]
+        speak(SUBJECT_PROMPT, wait=True)
+        subject = listen_command(timeout=FOLLOW_UP_TIMEOUT)
+        if is_cancel(subject):
+            speak(STOPPED)
+            return True
+        speak(BODY_PROMPT, wait=True)
+        body = listen_command(timeout=FOLLOW_UP_TIMEOUT)
+        if is_cancel(body):
+            speak(STOPPED)
+            return True
+        if not subject or not body:
+            speak("I didn't catch that, so I won't send the email.")
+            return True
         return send_email(recipient, subject, body)
-
-    # General question
-    if "what is" in command or "who is" in command or "what are" in command or "tell me about" in command:
+    if intent == "answer_question":
         return answer_question(command)
-
-    # Fallback to Google search
-    m = re.search(r'(search for|google|find) (.+)', command)
-    if m:
-        q = m.group(2).replace("on google", "").strip()
+    if intent == "google_search":
+        q = slots["query"].replace("on google", "").strip()
         return google_search(q)
 
-    speak("I'm not sure how to help with that. Would you like me to search for it?")
+    speak(FALLBACK_PROMPT, wait=True)
     return False
\ No newline at end of file
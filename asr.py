@@ -0,0 +1,163 @@
+import speech_recognition as sr
+import io
+import threading
+import queue
+import time
+import itertools
+
+# --- Recognition backends ---
+# A backend is anything with recognize(audio) -> str that raises
+# sr.UnknownValueError when nothing was understood.
+class GoogleBackend:
+    def __init__(self, timeout=None):
+        self.recognizer = sr.Recognizer()
+        self.recognizer.operation_timeout = timeout
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio)
+
+
+class SphinxBackend:
+    """Offline recognition; needs the pocketsphinx package."""
+
+    def __init__(self, timeout=None):
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_sphinx(audio)
+
+
+class StubBackend:
+    """
+    Local stand-in for tests and benchmarks: returns `text` (or text(audio)
+    if it is callable) after sleeping `delay` seconds, or delay(), if callable.
+    """
+
+    def __init__(self, text="hello", delay=0.0, timeout=None):
+        self.text = text
+        self.delay = delay
+
+    def recognize(self, audio):
+        delay = self.delay() if callable(self.delay) else self.delay
+        if delay:
+            time.sleep(delay)
+        text = self.text(audio) if callable(self.text) else self.text
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "sphinx": SphinxBackend,
+    "stub": StubBackend,
+}
+
+
+def make_backend(name, **kwargs):
+    try:
+        return BACKENDS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown recognizer backend: {name}")
+
+
+_clip_backend = None  # (name, backend), one per process
+
+def recognize_clip(data, backend="google", timeout=None):
+    """
+    Recognize a whole WAV clip given as bytes; "" if nothing was understood.
+    A plain function so it can run on a ProcessPoolExecutor; the backend is
+    made once per worker process.
+    """
+    global _clip_backend
+    if _clip_backend is None or _clip_backend[0] != backend:
+        _clip_backend = (backend, make_backend(backend, timeout=timeout))
+    with sr.AudioFile(io.BytesIO(data)) as source:
+        audio = sr.Recognizer().record(source)
+    try:
+        return _clip_backend[1].recognize(audio)
+    except sr.UnknownValueError:
+        return ""
+
+
+# --- Recognition pool ---
+class RecognizerPool:
+    """
+    Recognize captured phrases on several worker threads.
+
+    Each submitted phrase gets a sequence number, and results are handed to
+    on_result(text, context) strictly in capture order, so a slow round-trip never
+    reorders commands. A phrase that is not recognized within `timeout`
+    seconds of being submitted is skipped and its late result discarded;
+    phrases with nothing understood are skipped as well.
+    """
+
+    def __init__(self, backend, on_result, workers=2, timeout=10):
+        self.backend = backend
+        self.on_result = on_result
+        self.timeout = timeout
+        self._pending = queue.Queue()
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._next = 0
+        self._deadlines = {}
+        self._results = {}
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"asr-worker-{i}", daemon=True).start()
+        threading.Thread(target=self._deliver, name="asr-sequencer", daemon=True).start()
+
+    def submit(self, audio, context=None):
+        """Queue a phrase; `context` is passed back to on_result with its text."""
+        with self._cond:
+            seq = next(self._seq)
+            self._deadlines[seq] = time.monotonic() + self.timeout
+            self._cond.notify()
+        self._pending.put((seq, audio, context))
+        return seq
+
+    def _work(self):
+        while True:
+            seq, audio, context = self._pending.get()
+            with self._cond:
+                if seq < self._next:
+                    continue  # already timed out while waiting in the queue
+            try:
+                text = self.backend.recognize(audio)
+            except sr.UnknownValueError:
+                text = None
+            except Exception as e:
+                print(f"Recognition error: {e}")
+                text = None
+            with self._cond:
+                if seq >= self._next:
+                    self._results[seq] = (text, context)
+                    self._cond.notify()
+
+    def _deliver(self):
+        while True:
+            ready = []
+            with self._cond:
+                while not ready:
+                    head = self._next
+                    if head in self._results:
+                        ready.append(self._results.pop(head))
+                    elif head in self._deadlines:
+                        remaining = self._deadlines[head] - time.monotonic()
+                        if remaining > 0:
+                            self._cond.wait(remaining)
+                            continue
+                        print(f"Recognition timed out for phrase {head}")
+                        ready.append((None, None))
+                    else:
+                        self._cond.wait()
+                        continue
+                    del self._deadlines[head]
+                    self._next += 1
+                    # Hand over everything else that is already in order
+                    while self._next in self._results:
+                        ready.append(self._results.pop(self._next))
+                        del self._deadlines[self._next]
+                        self._next += 1
+            for text, context in ready:
+                if text:
+                    self.on_result(text, context)
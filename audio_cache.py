@@ -0,0 +1,123 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def cache_key(text, voice_id, rate):
+    """Stable file-name-safe key for one rendering of text."""
+    raw = f"{voice_id}\x00{rate}\x00{text}".encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+class AudioCache:
+    """
+    LRU cache of synthesized speech, on disk with a hot in-memory layer.
+
+    Files live in `directory` as <key>.wav and are evicted least recently
+    used first once they exceed `max_bytes`. Clips fetched with read() are
+    also kept in memory up to `memory_bytes`, so reading one again needs no
+    disk read; path() is for players that can only take a file. The
+    on-disk order survives restarts through file mtimes, which are bumped
+    on every hit.
+    """
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, memory_bytes=8 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self._lock = threading.Lock()
+        self._files = OrderedDict()  # key -> size, least recently used first
+        self._memory = OrderedDict()  # key -> bytes
+        self._disk_total = 0
+        self._memory_total = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".wav")
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".wav"):
+                continue
+            st = os.stat(os.path.join(self.directory, name))
+            entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._files[key] = size
+            self._disk_total += size
+
+    def path(self, key):
+        """Return the cached file for key (marking it recently used), or None."""
+        with self._lock:
+            if key not in self._files:
+                return None
+            self._files.move_to_end(key)
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._forget(key)
+            return None
+        return path
+
+    def read(self, key):
+        """Return the cached audio bytes for key, or None."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._files.move_to_end(key)
+                return data
+        path = self.path(key)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        with self._lock:
+            self._remember(key, data)
+        return data
+
+    def add(self, key, rendered_path):
+        """Move a freshly rendered file into the cache and evict if over the cap."""
+        path = self._path(key)
+        os.replace(rendered_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            if key in self._files:
+                self._disk_total -= self._files[key]
+            self._files[key] = size
+            self._files.move_to_end(key)
+            self._disk_total += size
+            while self._disk_total > self.max_bytes and len(self._files) > 1:
+                old_key = next(iter(self._files))
+                self._forget(old_key)
+                try:
+                    os.remove(self._path(old_key))
+                except OSError:
+                    pass
+        return path
+
+    def temp_path(self, key):
+        return os.path.join(self.directory, key + ".part")
+
+    def _remember(self, key, data):
+        if len(data) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_total -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_total += len(data)
+        while self._memory_total > self.memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_total -= len(old)
+
+    def _forget(self, key):
+        size = self._files.pop(key, None)
+        if size is not None:
+            self._disk_total -= size
+        data = self._memory.pop(key, None)
+        if data is not None:
+            self._memory_total -= len(data)
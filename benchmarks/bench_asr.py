@@ -0,0 +1,66 @@
+"""
+Benchmark: recognition throughput and tail latency vs. pool size.
+
+Feeds phrases at a steady rate into asr.RecognizerPool backed by a
+StubBackend with a slow, jittery "network" delay, and reports phrases/sec
+plus p50/p95/p99 submit-to-delivery latency. With one worker (the old
+capture-then-recognize loop) the queue backs up; more workers keep up.
+Run from the repo root:
+
+    python benchmarks/bench_asr.py
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asr import RecognizerPool, StubBackend
+
+PHRASES = 60
+INTERVAL = 0.1  # a new phrase every 100 ms
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run(workers):
+    rng = random.Random(0)
+    submitted = {}
+    latencies = []
+    order = []
+    finished = threading.Event()
+
+    def on_result(text, context):
+        latencies.append(time.perf_counter() - submitted[text])
+        order.append(int(text))
+        if len(order) == PHRASES:
+            finished.set()
+
+    backend = StubBackend(text=lambda audio: audio, delay=lambda: rng.uniform(0.1, 0.6))
+    pool = RecognizerPool(backend, on_result, workers=workers, timeout=60)
+    start = time.perf_counter()
+    for i in range(PHRASES):
+        submitted[str(i)] = time.perf_counter()
+        pool.submit(str(i))
+        time.sleep(INTERVAL)
+    finished.wait()
+    elapsed = time.perf_counter() - start
+    assert order == sorted(order), "results delivered out of order"
+    print(f"workers={workers}: {PHRASES / elapsed:5.1f} phrases/s  "
+          f"p50 {percentile(latencies, 0.50) * 1e3:7.0f} ms  "
+          f"p95 {percentile(latencies, 0.95) * 1e3:7.0f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1e3:7.0f} ms")
+
+
+def main():
+    for workers in (1, 2, 4, 8):
+        run(workers)
+
+
+if __name__ == "__main__":
+    main()
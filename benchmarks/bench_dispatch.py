@@ -0,0 +1,71 @@
+"""
+Benchmark: command-to-dispatch latency of the main loop.
+
+A producer thread plays the listener's role and puts commands on a queue at
+random moments; the consumer is either the old loop (get_nowait + sleep(0.2))
+or the blocking get now used by voice_input.listen_command. Also counts how
+often each loop wakes up with nothing to do. Run from the repo root:
+
+    python benchmarks/bench_dispatch.py
+"""
+import queue
+import random
+import statistics
+import threading
+import time
+
+COMMANDS = 40
+
+
+def polling_loop(q, latencies, done):
+    idle_wakeups = 0
+    while not done.is_set() or not q.empty():
+        try:
+            sent = q.get_nowait()
+        except queue.Empty:
+            sent = None
+            idle_wakeups += 1
+        if sent is not None:
+            latencies.append(time.perf_counter() - sent)
+        time.sleep(0.2)
+    return idle_wakeups
+
+
+def blocking_loop(q, latencies, done):
+    while True:
+        sent = q.get()
+        if sent is None:
+            return 0  # get() only returns when there is something to do
+        latencies.append(time.perf_counter() - sent)
+
+
+def run(loop):
+    q = queue.Queue()
+    latencies = []
+    done = threading.Event()
+    result = {}
+    consumer = threading.Thread(target=lambda: result.setdefault("wakeups", loop(q, latencies, done)))
+    consumer.start()
+    start = time.perf_counter()
+    for _ in range(COMMANDS):
+        time.sleep(random.uniform(0.05, 0.35))
+        q.put(time.perf_counter())
+    done.set()
+    if loop is blocking_loop:
+        q.put(None)  # wake the blocking consumer so it can exit
+    consumer.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{loop.__name__:>14}: mean {statistics.mean(latencies) * 1e3:7.2f} ms  "
+          f"p95 {p95 * 1e3:7.2f} ms  idle wakeups/s {result['wakeups'] / elapsed:5.1f}")
+
+
+def main():
+    random.seed(0)
+    run(polling_loop)
+    run(blocking_loop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: answer extraction from search-result HTML.
+
+Compares the old full BeautifulSoup(html, "html.parser") parse + find()
+with extract.extract(), reporting time per page and peak memory
+(tracemalloc). Pass saved result pages as arguments; without arguments the
+pages in benchmarks/fixtures/ (laid out like Google's basic-HTML results,
+which is what the selectors target) plus two synthetic ~450 KB pages are
+used. Needs beautifulsoup4 for the comparison only:
+
+    python benchmarks/bench_extract.py [page.html ...]
+"""
+import os
+import sys
+import glob
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "*.html")
+
+from bs4 import BeautifulSoup
+from extract import extract, DEFAULT_RULES
+
+
+def synthetic_page(results=2000, with_answer=True):
+    filler = "".join(
+        f'<div class="g"><a href="https://example.com/{i}"><h3>Result {i}</h3></a>'
+        f'<div class="BNeawe s3v9rd AP7Wnd"><span>Snippet text number {i} &amp; more</span></div>'
+        f'<div class="meta"><span>cached</span><br><img src="x.png"></div></div>'
+        for i in range(results))
+    answer = '<div class="BNeawe iBp4i AP7Wnd"><div>72&deg;F</div></div>' \
+             '<div class="BNeawe tAd8D AP7Wnd">Sunny</div>' if with_answer else ""
+    return f"<html><head><title>q</title></head><body>{answer}{filler}</body></html>"
+
+
+def soup_answer(html):
+    soup = BeautifulSoup(html, "html.parser")
+    found = (soup.find("div", class_="BNeawe iBp4i AP7Wnd")
+             or soup.find("div", class_="BNeawe s3v9rd AP7Wnd"))
+    return found.text if found else None
+
+
+def fast_answer(html):
+    return extract(html, DEFAULT_RULES["answer"])["answer"]
+
+
+def measure(fn, html, repeat=5):
+    tracemalloc.start()
+    result = fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    return result, (time.perf_counter() - start) / repeat, peak
+
+
+def main():
+    paths = sys.argv[1:] or sorted(glob.glob(FIXTURES))
+    pages = [(os.path.basename(path), open(path, encoding="utf-8", errors="replace").read()) for path in paths]
+    if not sys.argv[1:]:
+        # Worst case for early exit: no direct answer, so the whole page is read
+        pages += [("synthetic", synthetic_page()),
+                  ("synthetic, snippet only", synthetic_page(with_answer=False))]
+    for name, html in pages:
+        print(f"{name} ({len(html) / 1024:.0f} KB)")
+        for fn in (soup_answer, fast_answer):
+            result, seconds, peak = measure(fn, html)
+            print(f"  {fn.__name__:>12}: {seconds * 1e3:8.2f} ms  peak {peak / 1024:8.0f} KB  -> {result!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark: intent routing cost vs. number of configured apps/sites.
+
+Compares the old linear scan from actions.handle_command (rebuilding
+f-strings for every app and site, uncompiled re.search calls) with the
+prebuilt IntentRouter. Run from the repo root:
+
+    python benchmarks/bench_router.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intents import build_router
+
+COMMANDS = [
+    "open chrome",
+    "go to github",
+    "play despacito on youtube",
+    "create file notes.txt",
+    "weather in new york",
+    "what is the capital of france",
+    "search for python tutorials",
+    "something nobody configured",
+]
+
+
+def make_config(n):
+    apps = {"chrome": "/usr/bin/chrome"}
+    sites = {"github": "https://github.com"}
+    for i in range(n):
+        apps[f"app{i}"] = f"/usr/bin/app{i}"
+        sites[f"site{i}"] = f"https://site{i}.example.com"
+    return {"applications": apps, "websites": sites}
+
+
+def legacy_route(config, command):
+    """The pre-router order of checks, kept here only for comparison."""
+    command = command.lower()
+    if "hello" in command or "hi" in command or "hey" in command:
+        return "greet"
+    for app_name in config.get("applications", {}):
+        if f"open {app_name.lower()}" in command or f"start {app_name.lower()}" in command:
+            return "open_application"
+    for site in config.get("websites", {}):
+        if f"open {site.lower()}" in command or f"go to {site.lower()}" in command:
+            return "open_website"
+    if "play" in command and "on youtube" in command:
+        return "play_song_on_youtube"
+    if "read my email" in command or "check my email" in command:
+        return "read_emails"
+    if re.search(r'create file ([\w_.-]+)', command):
+        return "create_file"
+    if re.search(r'open file ([\w_.-]+)', command):
+        return "open_file"
+    if re.search(r'delete file ([\w_.-]+)', command):
+        return "delete_file"
+    if re.search(r'weather in (.+)', command):
+        return "get_weather"
+    if re.search(r'send an email to (.+)', command):
+        return "send_email"
+    if "what is" in command or "who is" in command or "what are" in command or "tell me about" in command:
+        return "answer_question"
+    if re.search(r'(search for|google|find) (.+)', command):
+        return "google_search"
+    return None
+
+
+def main():
+    number = 200
+    print(f"{'entries':>8} {'legacy us/cmd':>14} {'router us/cmd':>14}")
+    for n in (4, 50, 200, 1000):
+        config = make_config(n)
+        router = build_router(config)
+        legacy = timeit.timeit(
+            lambda: [legacy_route(config, c) for c in COMMANDS], number=number)
+        routed = timeit.timeit(
+            lambda: [router.resolve(c) for c in COMMANDS], number=number)
+        per_cmd = number * len(COMMANDS)
+        print(f"{n:>8} {legacy / per_cmd * 1e6:>14.2f} {routed / per_cmd * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
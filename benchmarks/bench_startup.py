@@ -0,0 +1,75 @@
+"""
+Benchmark: assistant start-up cost.
+
+1. `python -X importtime -c "import main"`: cumulative import time of the
+   project modules and the slowest third-party imports they pull in.
+2. Wall-clock time from interpreter start to the first prompt being ready
+   to speak: import main, start the TTS warm-up and wait for the engine.
+   The microphone is not opened.
+
+Each measurement runs in a fresh interpreter; run from the repo root:
+
+    python benchmarks/bench_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT = {"main", "actions", "tts", "voice_input", "intents", "http_client",
+           "extract", "mail", "outbox", "asr", "vad", "audio_cache", "executor",
+           "config"}
+
+FIRST_PROMPT = """
+import time
+start = time.perf_counter()
+import main, tts
+tts.warm_up()
+tts.wait_ready(30)
+print("first prompt", time.perf_counter() - start)
+"""
+
+
+def import_times():
+    """Return [(cumulative_us, module, depth)] for imports made by `import main`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=ROOT, capture_output=True, text=True)
+    times = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2][1:]  # nesting is shown as two spaces per level
+        depth = (len(name) - len(name.lstrip())) // 2
+        times.append((int(parts[1]), name.strip(), depth))
+        # Children are listed before their parent; drop anything not under main
+        if depth == 0:
+            if name.strip() == "main":
+                return times
+            times = []
+    return times
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    times = import_times()
+    print("Cumulative import time (ms):")
+    for us, name, _ in sorted(times, reverse=True):
+        if name in PROJECT:
+            print(f"  {name:<14}{us / 1000:8.1f}")
+    print("Slowest dependencies imported by project modules (ms):")
+    direct = [(us, name) for us, name, depth in times if depth in (1, 2) and name not in PROJECT]
+    for us, name in sorted(direct, reverse=True)[:8]:
+        print(f"  {name:<24}{us / 1000:8.1f}")
+
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", FIRST_PROMPT], cwd=ROOT,
+                             capture_output=True, text=True).stdout
+        samples.append(float(out.split("first prompt")[-1].split()[0]))
+    print(f"Time to first prompt: median {statistics.median(samples) * 1e3:.1f} ms over {runs} runs")
+
+
+if __name__ == "__main__":
+    main()
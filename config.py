@@ -0,0 +1,248 @@
+import os
+import json
+import time
+import shutil
+import platform
+import threading
+from intents import build_router
+from extract import DEFAULT_RULES
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+RELOAD_INTERVAL = 1.0  # seconds between checks of config.json's mtime
+FUZZY_MIN_SCORE = 0.5  # trigram overlap (Dice coefficient) needed for a near-miss match
+
+SYSTEM = platform.system().lower()
+
+
+class ConfigError(ValueError):
+    """config.json can't be read, isn't JSON, or has the wrong shape."""
+
+
+# --- Validation ---
+def _check(condition, message):
+    if not condition:
+        raise ConfigError(message)
+
+def validate(raw):
+    """Raise ConfigError describing the first problem found in a parsed config.json."""
+    _check(isinstance(raw, dict), "config.json must hold a JSON object")
+    apps = raw.get("applications", {})
+    _check(isinstance(apps, dict), '"applications" must be an object')
+    for name, info in apps.items():
+        if isinstance(info, dict):
+            _check(all(isinstance(path, str) for path in info.values()),
+                   f'paths for application "{name}" must be strings')
+        else:
+            _check(isinstance(info, str), f'application "{name}" must be a path or an object of paths per OS')
+    sites = raw.get("websites", {})
+    _check(isinstance(sites, dict), '"websites" must be an object')
+    for name, url in sites.items():
+        _check(isinstance(url, str) and url.startswith(("http://", "https://")),
+               f'website "{name}" must be an http(s) URL')
+    aliases = raw.get("aliases", {})
+    _check(isinstance(aliases, dict), '"aliases" must be an object')
+    known = {name.lower() for name in apps} | {name.lower() for name in sites}
+    for alias, target in aliases.items():
+        _check(isinstance(target, str) and target.lower() in known,
+               f'alias "{alias}" must name a configured application or website')
+    for section in ("gmail", "extractors", "metrics"):
+        _check(isinstance(raw.get(section) or {}, dict), f'"{section}" must be an object')
+    gmail = raw.get("gmail") or {}
+    for kind in ("imap", "smtp"):
+        _check(isinstance(gmail.get(f"{kind}_host", ""), str), f'"gmail.{kind}_host" must be a string')
+        _check(type(gmail.get(f"{kind}_port", 0)) is int, f'"gmail.{kind}_port" must be a number')
+        _check(isinstance(gmail.get(f"{kind}_ssl", True), bool), f'"gmail.{kind}_ssl" must be true or false')
+    for name, rules in (raw.get("extractors") or {}).items():
+        _check(name in DEFAULT_RULES, f'unknown extractor "{name}" (expected one of {", ".join(DEFAULT_RULES)})')
+        _check(isinstance(rules, dict), f'extractor "{name}" must be an object of fields')
+        for field, selectors in rules.items():
+            _check(field in DEFAULT_RULES[name],
+                   f'extractor "{name}" has no field "{field}" (expected {", ".join(DEFAULT_RULES[name])})')
+            _check(isinstance(selectors, list) and selectors and all(
+                       isinstance(sel, dict) and isinstance(sel.get("class"), str)
+                       and isinstance(sel.get("tag", "div"), str) for sel in selectors),
+                   f'selectors for "{name}.{field}" must be a list of {{"tag", "class"}} objects')
+
+
+def _resolve_path(info):
+    """Return (path for this OS or None, whether it was found on disk or on PATH)."""
+    path = info.get(SYSTEM) if isinstance(info, dict) else info
+    if not path:
+        return None, False
+    if os.path.exists(path):
+        return path, True
+    found = shutil.which(path)
+    if found:
+        return found, True
+    return path, False
+
+
+# --- Fuzzy names ---
+def _trigrams(text):
+    text = " " + " ".join(text.lower().split()) + " "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class FuzzyIndex:
+    """
+    Map near-miss transcripts ("vs cold", "git hub") to configured names by
+    character-trigram overlap. Names are indexed once per config load in an
+    inverted index (trigram -> names), so a lookup only scores the names
+    that share a trigram with what was heard instead of the whole catalog.
+    """
+
+    def __init__(self, names, min_score=FUZZY_MIN_SCORE):
+        self.min_score = min_score
+        self._sizes = {}  # name -> number of trigrams
+        self._postings = {}  # trigram -> [names]
+        for name in names:
+            grams = _trigrams(name)
+            self._sizes[name] = len(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(name)
+
+    def lookup(self, text):
+        """Return (name, score) for the closest name, or (None, 0.0) if none is close enough."""
+        grams = _trigrams(text)
+        shared = {}
+        for gram in grams:
+            for name in self._postings.get(gram, ()):
+                shared[name] = shared.get(name, 0) + 1
+        best, best_score = None, 0.0
+        for name, count in shared.items():
+            score = 2.0 * count / (len(grams) + self._sizes[name])
+            if score > best_score:
+                best, best_score = name, score
+        if best_score < self.min_score:
+            return None, 0.0
+        return best, best_score
+
+
+# --- Settings ---
+class Settings:
+    """
+    One validated view of config.json with its lookup tables built up front:
+    app name -> path for this OS (checked against the disk and PATH), site
+    -> URL, alias -> canonical name, the intent router and the fuzzy name
+    index. Never modified after it is built; a reload builds a new one.
+    """
+
+    def __init__(self, raw, mtime=None):
+        validate(raw)
+        self.raw = raw
+        self.mtime = mtime
+        self.apps = {}
+        self.missing_apps = set()
+        for name, info in raw.get("applications", {}).items():
+            path, found = _resolve_path(info)
+            self.apps[name.lower()] = path
+            if path and not found:
+                self.missing_apps.add(name.lower())
+        self.sites = {name.lower(): url for name, url in raw.get("websites", {}).items()}
+        self.aliases = {alias.lower(): target.lower() for alias, target in raw.get("aliases", {}).items()}
+        # Field by field, so overriding one selector list keeps the others
+        custom = raw.get("extractors") or {}
+        self.extractors = {name: {**rules, **custom.get(name, {})} for name, rules in DEFAULT_RULES.items()}
+        self.router = build_router(raw)
+        self.fuzzy = FuzzyIndex(list(self.apps) + list(self.sites) + list(self.aliases))
+
+    @property
+    def gmail(self):
+        return self.raw.get("gmail")
+
+    def canonical(self, name):
+        name = " ".join(name.lower().split())
+        return self.aliases.get(name, name)
+
+    def app_path(self, name):
+        return self.apps.get(self.canonical(name))
+
+    def site_url(self, name):
+        return self.sites.get(self.canonical(name))
+
+    def match(self, spoken):
+        """
+        Return ("application" | "website", name) for a spoken name, trying an
+        exact name or alias first and then the fuzzy index; (None, None) if
+        nothing is close.
+        """
+        name = self.canonical(spoken)
+        if name not in self.apps and name not in self.sites:
+            name, _ = self.fuzzy.lookup(name)
+            if name is None:
+                return None, None
+            name = self.aliases.get(name, name)
+        if name in self.apps:
+            return "application", name
+        return "website", name
+
+
+def load(path=None):
+    """Read and validate config.json into a new Settings."""
+    path = path or CONFIG_PATH
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        with open(path, "r") as f:
+            raw = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"can't load {path}: {e}")
+    return Settings(raw, mtime)
+
+
+# --- Hot reload ---
+_current = None
+_lock = threading.Lock()
+_rejected_mtime = None  # a broken edit is reported once, not on every check
+_watcher = None
+
+def current():
+    """
+    The active Settings. Take it once per lookup and read related tables
+    (say app_path and missing_apps) from that one object, so a reload in
+    between can't mix old and new ones; later steps of the same command
+    may already see the next config.
+    """
+    global _current
+    if _current is None:
+        with _lock:
+            if _current is None:
+                _current = load()
+    return _current
+
+def reload_if_changed():
+    """Swap in a new Settings if config.json's mtime changed; True if it did."""
+    global _current, _rejected_mtime
+    try:
+        mtime = os.stat(CONFIG_PATH).st_mtime_ns
+    except OSError:
+        return False
+    if mtime == current().mtime or mtime == _rejected_mtime:
+        return False
+    try:
+        settings = load()
+    except ConfigError as e:
+        _rejected_mtime = mtime
+        print(f"Keeping the previous config: {e}")
+        return False
+    # Built off to the side and swapped in one assignment; commands already
+    # running keep the Settings they started with
+    _current = settings
+    print("Reloaded config.json")
+    return True
+
+def start_watching(interval=RELOAD_INTERVAL):
+    """Poll config.json in the background and reload it when it changes (once)."""
+    global _watcher
+    if _watcher is not None:
+        return
+
+    def _watch_forever():
+        while True:
+            time.sleep(interval)
+            try:
+                reload_if_changed()
+            except Exception as e:
+                print(f"Config reload failed: {e}")
+
+    _watcher = threading.Thread(target=_watch_forever, name="config-watch", daemon=True)
+    _watcher.start()
@@ -0,0 +1,138 @@
+import threading
+import queue
+import time
+import itertools
+import metrics
+import tts
+
+ACTION_TIMEOUT = 20  # seconds before an action's reply is given up on
+ACTION_WORKERS = 2
+
+
+class _Job:
+    __slots__ = ("seq", "name", "func", "args", "trace_id", "deadline", "speech", "state")
+
+    def __init__(self, seq, name, func, args, trace_id, deadline):
+        self.seq = seq
+        self.name = name
+        self.func = func
+        self.args = args
+        self.trace_id = trace_id
+        self.deadline = deadline
+        self.speech = None
+        self.state = "queued"  # -> running -> done -> delivering, or cancelled / timed_out
+
+
+class ActionExecutor:
+    """
+    Run actions on a bounded pool of worker threads so a slow lookup doesn't
+    hold up the commands behind it.
+
+    Whatever an action speaks is captured (see tts.capture) and handed to the
+    speech worker strictly in submission order, like RecognizerPool does for
+    transcripts. An action that hasn't finished by its deadline is abandoned
+    and on_timeout(name) is called in its place; cancel() abandons everything
+    not yet delivered. Python threads can't be killed, so an action that has
+    already started runs to the end on its worker, but its speech is dropped.
+    """
+
+    def __init__(self, workers=ACTION_WORKERS, timeout=ACTION_TIMEOUT, on_timeout=None):
+        self.timeout = timeout
+        self.on_timeout = on_timeout
+        self._pending = queue.Queue()
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._next = 0
+        self._jobs = {}  # seq -> _Job, until its reply has been delivered
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"action-worker-{i}", daemon=True).start()
+        threading.Thread(target=self._deliver, name="action-sequencer", daemon=True).start()
+
+    def submit(self, name, func, *args, timeout=None):
+        """Queue func(*args); its speech is delivered after that of earlier actions."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        with self._cond:
+            job = _Job(next(self._seq), name, func, args, metrics.current(), deadline)
+            self._jobs[job.seq] = job
+            self._cond.notify_all()
+        self._pending.put(job)
+        return job.seq
+
+    def prefetch(self, func, *args):
+        """Run func(*args) on the pool outside the ordered replies; anything it says is dropped."""
+        self._pending.put(_Job(None, getattr(func, "__name__", "prefetch"), func, args, None, None))
+
+    def cancel(self):
+        """Abandon every action whose reply hasn't been delivered; returns how many."""
+        count = 0
+        with self._cond:
+            for job in self._jobs.values():
+                if job.state in ("queued", "running", "done", "delivering"):
+                    job.state = "cancelled"
+                    count += 1
+            self._cond.notify_all()
+        return count
+
+    def wait_idle(self, timeout=None):
+        """Block until every submitted action has been delivered; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._jobs, timeout)
+
+    def _work(self):
+        while True:
+            job = self._pending.get()
+            with self._cond:
+                if job.state != "queued":
+                    continue  # cancelled or timed out before it started
+                job.state = "running"
+            metrics.activate(job.trace_id)
+            speech = []
+            try:
+                with tts.capture(speech):
+                    job.func(*job.args)
+            except Exception as e:
+                print(f"Action {job.name} failed: {e}")
+            metrics.mark(job.trace_id, "action_done")
+            metrics.activate(None)
+            with self._cond:
+                if job.state == "running":
+                    job.speech = speech
+                    job.state = "done"
+                    self._cond.notify_all()
+
+    def _deliver(self):
+        while True:
+            with self._cond:
+                while True:
+                    job = self._jobs.get(self._next)
+                    if job is None:
+                        self._cond.wait()
+                        continue
+                    if job.state == "done":
+                        job.state = "delivering"
+                        break
+                    if job.state == "cancelled":
+                        break
+                    remaining = job.deadline - time.monotonic()
+                    if remaining > 0:
+                        self._cond.wait(remaining)
+                        continue
+                    print(f"Action {job.name} timed out")
+                    job.state = "timed_out"
+                    break
+            # Spoken before the job is retired, so wait_idle() covers its speech
+            metrics.activate(job.trace_id)
+            try:
+                for text, priority in job.speech or ():
+                    if job.state != "delivering":
+                        break  # cancelled part-way through
+                    tts.speak(text, priority)
+                if job.state == "timed_out" and self.on_timeout:
+                    self.on_timeout(job.name)
+            except Exception as e:
+                print(f"Reply for {job.name} failed: {e}")
+            metrics.activate(None)
+            with self._cond:
+                del self._jobs[job.seq]
+                self._next += 1
+                self._cond.notify_all()
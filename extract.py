@@ -0,0 +1,101 @@
+from html.parser import HTMLParser
+
+# Used for any field config.json's "extractors" section leaves out. Each
+# field lists its selectors best first; the first one found in that order
+# wins, like the chained soup.find() calls these replace.
+DEFAULT_RULES = {
+    "answer": {
+        "answer": [
+            {"tag": "div", "class": "BNeawe iBp4i AP7Wnd"},
+            {"tag": "div", "class": "BNeawe s3v9rd AP7Wnd"},
+        ],
+    },
+    "weather": {
+        "temperature": [{"tag": "div", "class": "BNeawe iBp4i AP7Wnd"}],
+        "condition": [{"tag": "div", "class": "BNeawe tAd8D AP7Wnd"}],
+    },
+}
+
+CHUNK_SIZE = 16 * 1024
+
+
+class _Done(Exception):
+    pass
+
+
+class _FieldParser(HTMLParser):
+    """Collect the text of the first element matching each field's selectors."""
+
+    def __init__(self, fields):
+        super().__init__(convert_charrefs=True)
+        self._selectors = []  # (tag, class string, field, rank)
+        for field, selectors in fields.items():
+            for rank, sel in enumerate(selectors):
+                cls = " ".join(sel.get("class", "").split())
+                self._selectors.append((sel.get("tag", "div"), cls, field, rank))
+        self._tags = {tag for tag, _, _, _ in self._selectors}
+        self.found = {}  # field -> (rank, text)
+        self._fields = set(fields)
+        self._open = []  # [field, rank, tag, depth, parts]
+
+    def handle_starttag(self, tag, attrs):
+        for capture in self._open:
+            if capture[2] == tag:
+                capture[3] += 1
+        if tag not in self._tags:
+            return
+        cls = None
+        for name, value in attrs:
+            if name == "class":
+                cls = " ".join((value or "").split())
+                break
+        if cls is None:
+            return
+        for sel_tag, sel_cls, field, rank in self._selectors:
+            if sel_tag != tag or sel_cls != cls:
+                continue
+            best = self.found.get(field)
+            if best is not None and best[0] <= rank:
+                continue
+            if any(c[0] == field and c[1] <= rank for c in self._open):
+                continue
+            self._open.append([field, rank, tag, 1, []])
+
+    def handle_data(self, data):
+        for capture in self._open:
+            capture[4].append(data)
+
+    def handle_endtag(self, tag):
+        closed = []
+        for capture in self._open:
+            if capture[2] == tag:
+                capture[3] -= 1
+                if capture[3] == 0:
+                    closed.append(capture)
+        for capture in closed:
+            self._open.remove(capture)
+            field, rank, _, _, parts = capture
+            best = self.found.get(field)
+            if best is None or rank < best[0]:
+                self.found[field] = (rank, "".join(parts))
+        if closed and all(self.found.get(f, (1,))[0] == 0 for f in self._fields):
+            raise _Done()
+
+
+def extract(html, fields):
+    """
+    Return {field: text or None} for `fields` ({field: [selector, ...]}).
+
+    The page is fed to a streaming html.parser in chunks and parsing stops
+    as soon as every field has matched its first-choice selector, so no
+    tree is built and the rest of a large results page is never parsed.
+    """
+    parser = _FieldParser(fields)
+    try:
+        for start in range(0, len(html), CHUNK_SIZE):
+            parser.feed(html[start:start + CHUNK_SIZE])
+        parser.close()
+    except _Done:
+        pass
+    return {field: parser.found[field][1] if field in parser.found else None
+            for field in fields}
@@ -0,0 +1,86 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36"
+
+CONNECT_TIMEOUT = 3.05  # seconds
+READ_TIMEOUT = 10
+MAX_RETRIES = 2
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Shared keep-alive session with a small connection pool and retries."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            # Imported here: requests is slow to import and many sessions never need it
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            retry = Retry(total=MAX_RETRIES, connect=MAX_RETRIES, read=MAX_RETRIES,
+                          backoff_factor=0.3, status_forcelist=(500, 502, 503, 504),
+                          allowed_methods=("GET", "HEAD"))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+            session = requests.Session()
+            session.headers["User-Agent"] = USER_AGENT
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def get(url, params=None, timeout=None):
+    """GET through the shared session with connect/read timeouts; raises on HTTP errors."""
+    response = get_session().get(url, params=params,
+                                 timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT))
+    response.raise_for_status()
+    return response
+
+
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_query(query):
+    """Cache key for a spoken query: lowercase, no punctuation, single spaces."""
+    return " ".join(_NON_WORD_RE.sub(" ", query.lower()).split())
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after being set."""
+
+    def __init__(self, maxsize=256, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
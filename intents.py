@@ -0,0 +1,144 @@
+import re
+
+# Tokens are words plus the characters file names need ("notes.txt", "my-file")
+# inside them; sentence punctuation ("hi.", "chrome.") is not part of a token
+_TOKEN_RE = re.compile(r"\w+(?:['.-]\w+)*")
+# What typed commands end with; dropped so slot patterns don't capture it
+_END_PUNCTUATION = " \t\r\n.,!?;:"
+
+
+def tokenize(text):
+    """Split a transcript into lowercase word tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _Node:
+    __slots__ = ("children", "rules")
+
+    def __init__(self):
+        self.children = {}
+        self.rules = []
+
+
+class _Rule:
+    __slots__ = ("priority", "intent", "slots", "pattern")
+
+    def __init__(self, priority, intent, slots=None, pattern=None):
+        self.priority = priority
+        self.intent = intent
+        self.slots = slots or {}
+        self.pattern = pattern
+
+
+class IntentRouter:
+    """
+    Resolve a transcript to (intent, slots) with one pass over its tokens.
+
+    Trigger phrases are stored in a word trie, so matching respects word
+    boundaries ("hi" no longer fires inside "this" or "chrome") and the cost
+    depends on the length of the command, not on how many apps and sites are
+    configured. Rules carry a priority; the lowest matching priority wins,
+    which keeps the original order of checks in handle_command. A rule can
+    also carry a precompiled slot pattern that must match the command.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._max_depth = 0
+
+    def add(self, phrase, priority, intent, slots=None, pattern=None):
+        tokens = tokenize(phrase)
+        if not tokens:
+            return
+        node = self._root
+        for token in tokens:
+            node = node.children.setdefault(token, _Node())
+        node.rules.append(_Rule(priority, intent, slots, pattern))
+        self._max_depth = max(self._max_depth, len(tokens))
+
+    def _candidates(self, tokens):
+        found = []
+        for start in range(len(tokens)):
+            node = self._root
+            for token in tokens[start:start + self._max_depth]:
+                node = node.children.get(token)
+                if node is None:
+                    break
+                found.extend(node.rules)
+        return found
+
+    def resolve(self, command):
+        """Return (intent, slots) for a command, or (None, {}) if nothing matches."""
+        command = command.lower().rstrip(_END_PUNCTUATION)
+        candidates = self._candidates(tokenize(command))
+        candidates.sort(key=lambda rule: rule.priority)
+        for rule in candidates:
+            if rule.pattern is None:
+                return rule.intent, dict(rule.slots)
+            m = rule.pattern.search(command)
+            if m:
+                slots = dict(rule.slots)
+                slots.update({k: v.strip() for k, v in m.groupdict().items() if v is not None})
+                return rule.intent, slots
+        return None, {}
+
+
+# Precompiled slot patterns
+_CANCEL_RE = re.compile(r"^(?:jarvis\s+)?(?:stop|cancel|never mind)(?:\s+(?:it|that|this))?\s*$")
+_YOUTUBE_RE = re.compile(r"\bplay\b")
+_CREATE_FILE_RE = re.compile(r"\bcreate file (?P<file_name>[\w_.-]+)")
+_OPEN_FILE_RE = re.compile(r"\bopen file (?P<file_name>[\w_.-]+)")
+_DELETE_FILE_RE = re.compile(r"\bdelete file (?P<file_name>[\w_.-]+)")
+_WEATHER_RE = re.compile(r"\bweather in (?P<location>.+)")
+_SEND_EMAIL_RE = re.compile(r"\bsend an email to (?P<recipient>.+)")
+_SEARCH_RE = re.compile(r"\b(?:search for|google|find) (?P<query>.+)")
+_OPEN_NAME_RE = re.compile(r"\b(?:open|start|launch|go to) (?:the )?(?P<name>.+)")
+
+
+def build_router(config):
+    """Build the intent router once from the loaded config.json."""
+    router = IntentRouter()
+
+    # Only as the whole command ("stop", "cancel that"), not "bus stop times"
+    for phrase in ("stop", "cancel", "never mind"):
+        router.add(phrase, -1, "cancel", pattern=_CANCEL_RE)
+
+    for phrase in ("hello", "hi", "hey"):
+        router.add(phrase, 0, "greet")
+
+    apps = {name.lower() for name in config.get("applications", {})}
+    sites = {name.lower() for name in config.get("websites", {})}
+    # Aliases ("browser" -> "chrome") trigger the same rules as the real name
+    names = [(name, name) for name in apps | sites]
+    names += [(alias.lower(), target.lower()) for alias, target in config.get("aliases", {}).items()]
+    for spoken, name in names:
+        if name in apps:
+            for verb in ("open", "start"):
+                router.add(f"{verb} {spoken}", 1, "open_application", {"app_name": name})
+        if name in sites:
+            for verb in ("open", "go to"):
+                router.add(f"{verb} {spoken}", 2, "open_website", {"site_name": name})
+
+    router.add("on youtube", 3, "play_song_on_youtube", pattern=_YOUTUBE_RE)
+
+    for phrase in ("read my email", "read my emails", "check my email", "check my emails"):
+        router.add(phrase, 4, "read_emails")
+
+    router.add("create file", 5, "create_file", pattern=_CREATE_FILE_RE)
+    router.add("open file", 6, "open_file", pattern=_OPEN_FILE_RE)
+    router.add("delete file", 7, "delete_file", pattern=_DELETE_FILE_RE)
+    router.add("weather in", 8, "get_weather", pattern=_WEATHER_RE)
+    router.add("send an email to", 9, "send_email", pattern=_SEND_EMAIL_RE)
+
+    for phrase in ("what is", "who is", "what are", "tell me about"):
+        router.add(phrase, 10, "answer_question")
+
+    for phrase in ("search for", "google", "find"):
+        router.add(phrase, 11, "google_search", pattern=_SEARCH_RE)
+
+    # Anything else opened by name is matched against the catalog fuzzily
+    # ("open vs cold"), see config.FuzzyIndex
+    for verb in ("open", "start", "launch", "go to"):
+        router.add(verb, 12, "open_by_name", pattern=_OPEN_NAME_RE)
+
+    return router
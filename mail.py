@@ -0,0 +1,129 @@
+import re
+import email
+import imaplib
+import threading
+from collections import namedtuple
+from email.header import decode_header, make_header
+
+IMAP_HOST = "imap.gmail.com"
+IMAP_PORT = 993
+IMAP_TIMEOUT = 10  # seconds; a half-open session fails instead of blocking the lock forever
+
+# Headers only, and PEEK so checking mail doesn't mark anything as read
+HEADER_FETCH = "(UID BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE)])"
+
+_UID_RE = re.compile(rb"\bUID (\d+)")
+
+MailHeader = namedtuple("MailHeader", "uid sender subject date")
+
+
+def _decode(value):
+    if not value:
+        return ""
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return value
+
+
+class ImapMailbox:
+    """
+    One authenticated IMAP session kept open between checks.
+
+    The connection is made on first use and re-made (once per call) when
+    the server has dropped it or stopped answering for `timeout` seconds. unseen() asks only for UIDs and then fetches
+    FROM/SUBJECT/DATE headers of the newest messages in a single batched
+    UID FETCH. Headers are remembered per UID for as long as the mailbox
+    UIDVALIDITY stays the same, so later checks only fetch headers of
+    messages that arrived since; a new UIDVALIDITY starts over.
+    """
+
+    def __init__(self, user, password, host=IMAP_HOST, port=IMAP_PORT, mailbox="INBOX", ssl=True,
+                 timeout=IMAP_TIMEOUT):
+        self.user = user
+        self.password = password
+        self.host = host
+        self.port = port
+        self.mailbox = mailbox
+        self.ssl = ssl
+        self.timeout = timeout
+        self.uidvalidity = None
+        self._conn = None
+        self._headers = {}  # uid -> MailHeader
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.ssl:
+            conn = imaplib.IMAP4_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            conn = imaplib.IMAP4(self.host, self.port, timeout=self.timeout)
+        conn.login(self.user, self.password)
+        return conn
+
+    def _call(self, fn):
+        with self._lock:
+            for attempt in range(2):
+                if self._conn is None:
+                    self._conn = self._connect()
+                try:
+                    return fn(self._conn)
+                except (imaplib.IMAP4.abort, OSError):
+                    # Server closed the idle session, or it went half-open and timed out
+                    self._drop()
+                    if attempt:
+                        raise
+
+    def _drop(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.shutdown()
+            except Exception:
+                pass
+
+    def unseen(self, limit=3):
+        """Return (number of unseen messages, [MailHeader] for the newest `limit`, newest first)."""
+        return self._call(lambda conn: self._unseen(conn, limit))
+
+    def _unseen(self, conn, limit):
+        conn.select(self.mailbox, readonly=True)
+        _, validity = conn.response("UIDVALIDITY")
+        validity = validity[0] if validity and validity[0] else None
+        if validity != self.uidvalidity:
+            # UIDs from before are meaningless now
+            self.uidvalidity = validity
+            self._headers.clear()
+
+        _, data = conn.uid("SEARCH", None, "UNSEEN")
+        uids = sorted(int(u) for u in (data[0] or b"").split())
+        newest = uids[::-1][:limit]
+        missing = [u for u in newest if u not in self._headers]
+        if missing:
+            self._fetch_headers(conn, missing)
+
+        # Forget messages that are no longer unseen
+        unseen = set(uids)
+        self._headers = {u: h for u, h in self._headers.items() if u in unseen}
+        return len(uids), [self._headers[u] for u in newest if u in self._headers]
+
+    def _fetch_headers(self, conn, uids):
+        _, data = conn.uid("FETCH", ",".join(str(u) for u in uids), HEADER_FETCH)
+        for item in data:
+            if not isinstance(item, tuple):
+                continue
+            m = _UID_RE.search(item[0])
+            if not m:
+                continue
+            msg = email.message_from_bytes(item[1])
+            uid = int(m.group(1))
+            self._headers[uid] = MailHeader(uid, _decode(msg.get("From")),
+                                            _decode(msg.get("Subject")), msg.get("Date", ""))
+
+    def close(self):
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.logout()
+            except Exception:
+                pass
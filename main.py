@@ -1,21 +1,92 @@
 import time
-from voice_input import listen_command
-from tts import speak
-from actions import handle_command, google_search
+import config
+import metrics
+from voice_input import listen_command, take_command, start_listening, FOLLOW_UP_TIMEOUT
+from tts import speak, interrupt, prerender, warm_up
+from executor import ActionExecutor
+from actions import (resolve_command, run_action, answer_question, prefetch_answer, resume_outbox, is_cancel,
+                     COMMON_PHRASES, INTERACTIVE_INTENTS, ACTION_TIMEOUTS, STOPPED, TIMED_OUT)
+
+ONLINE = "Jarvis is online and listening."
+DIALOG_WAIT = 5  # longest a dialog waits for earlier replies before going ahead
+
+_executor = None
+
+def _on_timeout(name):
+    speak(TIMED_OUT)
+
+def get_executor():
+    """Action worker pool; created on the first command so importing main stays cheap."""
+    global _executor
+    if _executor is None:
+        _executor = ActionExecutor(on_timeout=_on_timeout)
+    return _executor
+
+def _cancel(executor):
+    if executor.cancel():
+        speak(STOPPED)
+
+def _wait_for_replies(executor):
+    """
+    Let earlier replies finish before a dialog starts (for at most
+    DIALOG_WAIT), while still hearing a "stop"; False if one came in.
+    """
+    deadline = time.monotonic() + DIALOG_WAIT
+    while not executor.wait_idle(0.1):
+        if take_command(is_cancel) is not None:
+            interrupt()
+            _cancel(executor)
+            return False
+        if time.monotonic() >= deadline:
+            break
+    return True
+
+def dispatch(command):
+    """Handle one recognized command, including the search follow-up."""
+    # Barge-in: a new command cuts off whatever Jarvis is still saying
+    interrupt()
+    executor = get_executor()
+    intent, slots = resolve_command(command)
+    if intent == "cancel":
+        _cancel(executor)
+        return
+    if intent is not None and intent not in INTERACTIVE_INTENTS:
+        # Runs in the background; its reply is spoken after earlier ones
+        executor.submit(intent, run_action, intent, slots, command, timeout=ACTION_TIMEOUTS.get(intent))
+        return
+
+    # Dialogs read their answers from the command queue, so they run here,
+    # once earlier replies are out of the way
+    if not _wait_for_replies(executor):
+        return
+    if intent is None:
+        # Look the answer up while the user decides whether to search
+        executor.prefetch(prefetch_answer, command)
+    handled = run_action(intent, slots, command)
+    metrics.mark(metrics.current(), "action_done")
+    if intent is None and not handled:
+        # run_action has already asked whether to search for it
+        response = listen_command(timeout=FOLLOW_UP_TIMEOUT)
+        if response and "yes" in response.lower():
+            executor.submit("answer_question", answer_question, command,
+                            timeout=ACTION_TIMEOUTS.get("answer_question"))
 
 def main():
-    speak("Jarvis is online and listening.")
+    metrics.configure(config.current().raw.get("metrics"))
+    # Edits to config.json apply to the next command, no restart needed
+    config.start_watching()
+    # Engine init/voice selection and mic calibration run in parallel
+    warm_up()
+    start_listening()
+    speak(ONLINE)
+    # Fills the audio cache in the background so these replies play instantly
+    prerender((ONLINE,) + COMMON_PHRASES)
+    resume_outbox()
     while True:
+        # Blocks until the listener queues a command; no polling while idle
         command = listen_command()
         if command:
-            handled = handle_command(command)
-            if not handled:
-                speak("I'm not sure how to help with that. Would you like me to search for it?")
-                response = listen_command()
-                if response and "yes" in response.lower():
-                    google_search(command)
-        # If no command detected, silently continue (no repeated error)
-        time.sleep(0.2)  # Small sleep to reduce CPU usage
+            dispatch(command)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
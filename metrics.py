@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import itertools
+import threading
+from collections import OrderedDict, deque
+
+# Pipeline stages in order; each is recorded as seconds since speech_end
+STAGES = ("speech_end", "recognized", "intent", "action_done", "first_audio")
+
+ENABLED = False
+WINDOW = 1024  # most recent samples kept per (action, stage)
+MAX_OPEN_TRACES = 256
+QUANTILES = (0.5, 0.95, 0.99)
+
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_traces = OrderedDict()  # id -> _Trace, oldest first
+_samples = {}  # (action, stage) -> deque of seconds
+_local = threading.local()
+_dumper = None
+
+
+class _Trace:
+    __slots__ = ("marks", "action")
+
+    def __init__(self):
+        self.marks = {}
+        self.action = "unknown"
+
+
+# --- Recording ---
+# Every call returns straight away when metrics are disabled or the trace id
+# is None, so the hooks can stay in the hot path.
+def start():
+    """Open a trace for a new utterance, stamped with speech_end; None when disabled."""
+    if not ENABLED:
+        return None
+    trace_id = next(_ids)
+    trace = _Trace()
+    trace.marks["speech_end"] = time.monotonic()
+    with _lock:
+        _traces[trace_id] = trace
+        while len(_traces) > MAX_OPEN_TRACES:
+            _, old = _traces.popitem(last=False)
+            _record(old)
+    return trace_id
+
+
+def mark(trace_id, stage, action=None):
+    """Stamp a stage (first stamp wins); `action` labels the trace's histograms."""
+    if trace_id is None or not ENABLED:
+        return
+    now = time.monotonic()
+    with _lock:
+        trace = _traces.get(trace_id)
+        if trace is None:
+            return
+        trace.marks.setdefault(stage, now)
+        if action is not None:
+            trace.action = action
+        if stage == STAGES[-1]:
+            del _traces[trace_id]
+            _record(trace)
+
+
+def activate(trace_id):
+    """Make trace_id the current trace of this thread (see current())."""
+    _local.trace_id = trace_id
+
+
+def current():
+    return getattr(_local, "trace_id", None)
+
+
+def _record(trace):
+    # Called with _lock held
+    start_time = trace.marks.get("speech_end")
+    for stage, stamp in trace.marks.items():
+        if stage == "speech_end":
+            continue
+        key = (trace.action, stage)
+        samples = _samples.get(key)
+        if samples is None:
+            samples = _samples[key] = deque(maxlen=WINDOW)
+        samples.append(stamp - start_time)
+
+
+# --- Reporting ---
+def _quantile(sorted_values, q):
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def snapshot():
+    """Return {action: {stage: {"count": n, "p50": s, "p95": s, "p99": s}}}."""
+    with _lock:
+        items = [(key, sorted(values)) for key, values in _samples.items() if values]
+    result = {}
+    for (action, stage), values in items:
+        summary = {"count": len(values)}
+        for q in QUANTILES:
+            summary[f"p{int(q * 100)}"] = _quantile(values, q)
+        result.setdefault(action, {})[stage] = summary
+    return result
+
+
+def dump_jsonl(path):
+    """Append one line with the current percentiles."""
+    with open(path, "a") as f:
+        f.write(json.dumps({"time": time.time(), "latency": snapshot()}) + "\n")
+
+
+def dump_prometheus(path):
+    """Write the percentiles as a Prometheus text-format file (node_exporter textfile style)."""
+    name = "jarvis_stage_latency_seconds"
+    lines = [f"# HELP {name} Time from end of speech to each pipeline stage.",
+             f"# TYPE {name} summary"]
+    for action, stages in sorted(snapshot().items()):
+        for stage, summary in sorted(stages.items()):
+            labels = f'action="{action}",stage="{stage}"'
+            for q in QUANTILES:
+                lines.append(f'{name}{{{labels},quantile="{q}"}} {summary[f"p{int(q * 100)}"]:.6f}')
+            lines.append(f"{name}_count{{{labels}}} {summary['count']}")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def configure(settings):
+    """
+    Apply the "metrics" section of config.json:
+    {"enabled": bool, "format": "jsonl" | "prometheus", "path": file, "interval": seconds}
+    """
+    global ENABLED, _dumper
+    settings = settings or {}
+    ENABLED = bool(settings.get("enabled", False))
+    if not ENABLED or _dumper is not None or not settings.get("path"):
+        return
+    dump = dump_prometheus if settings.get("format") == "prometheus" else dump_jsonl
+    path = settings["path"]
+    interval = settings.get("interval", 60)
+
+    def _dump_forever():
+        while True:
+            time.sleep(interval)
+            try:
+                dump(path)
+            except OSError as e:
+                print(f"Metrics dump failed: {e}")
+
+    _dumper = threading.Thread(target=_dump_forever, name="metrics-dump", daemon=True)
+    _dumper.start()
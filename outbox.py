@@ -0,0 +1,225 @@
+import os
+import json
+import uuid
+import queue
+import smtplib
+import threading
+from email.message import EmailMessage
+
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 465
+
+SPOOL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outbox_spool.json")
+MAX_ATTEMPTS = 5  # failed tries before a message is parked until the next send() or start
+RETRY_BACKOFF = 2  # seconds before the first retry, doubled after each failure
+IDLE_TIMEOUT = 120  # close the warm SMTP session after this long without mail
+SMTP_TIMEOUT = 30  # seconds; a stale session fails and is retried instead of hanging the worker
+
+
+class Outbox:
+    """
+    Background mail queue that sends over one reused SMTP session.
+
+    send() only records the message and returns. A worker thread keeps an
+    authenticated SMTP connection warm while there is mail, retries failed
+    messages with exponential backoff, and reports each message's outcome
+    through on_result(message, sent). Unsent messages are kept in a JSON
+    spool file so they survive a restart; pending ones are resent when an
+    Outbox for the same spool is created again.
+
+    Only a permanent refusal (a 5xx reply to the sender, recipients or
+    data) drops a message; its status is then "rejected". After
+    MAX_ATTEMPTS transient failures a message is reported as not sent but
+    stays in the spool with status "failed", and is tried again on the
+    next send() or the next start. Only one Outbox should own a spool at a
+    time: use set_credentials() rather than a second Outbox, or stop() the
+    old one first.
+    """
+
+    def __init__(self, user, password, on_result=None, spool_path=None,
+                 host=SMTP_HOST, port=SMTP_PORT, ssl=True, timeout=SMTP_TIMEOUT):
+        self.user = user
+        self.password = password
+        self.on_result = on_result
+        self.spool_path = spool_path or SPOOL_PATH
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._pending = {}  # id -> message dict, in the order they were queued
+        self._lock = threading.Lock()
+        self._server = None
+        self._relogin = False
+        self._stopped = False
+        for message in self._load_spool():
+            message.setdefault("attempts", 0)
+            message.setdefault("status", "pending")
+            self._pending[message["id"]] = message
+        self._retry_parked()
+        for message in self._pending.values():
+            self._queue.put(message)
+        self._worker = threading.Thread(target=self._work, name="outbox", daemon=True)
+        self._worker.start()
+
+    def send(self, to, subject, body):
+        """Queue a message for delivery and return its id."""
+        message = {"id": uuid.uuid4().hex, "to": to, "subject": subject, "body": body,
+                   "attempts": 0, "status": "pending"}
+        with self._lock:
+            # The network is evidently worth another try for parked mail too
+            for parked in self._retry_parked():
+                self._queue.put(parked)
+            self._pending[message["id"]] = message
+            self._save_spool()
+        self._queue.put(message)
+        return message["id"]
+
+    def set_credentials(self, user, password):
+        """Send as a different account from the next message on (the session logs in again)."""
+        with self._lock:
+            self.user = user
+            self.password = password
+            self._relogin = True
+
+    def stop(self, timeout=None):
+        """Close the session and stop the worker; unsent mail stays in the spool."""
+        self._stopped = True
+        self._queue.put(None)
+        self._worker.join(timeout)
+
+    def pending(self):
+        with self._lock:
+            return list(self._pending.values())
+
+    def _retry_parked(self):
+        # Called with self._lock held (or before the worker starts)
+        parked = [m for m in self._pending.values() if m.get("status") == "failed"]
+        for message in parked:
+            message["status"] = "pending"
+            message["attempts"] = 0
+        return parked
+
+    # --- Spool ---
+    def _load_spool(self):
+        try:
+            with open(self.spool_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            print(f"Outbox spool unreadable: {e}")
+            return []
+
+    def _save_spool(self):
+        # Called with self._lock held; write-then-rename so a crash can't truncate it
+        if not self._pending:
+            if os.path.exists(self.spool_path):
+                os.remove(self.spool_path)
+            return
+        tmp_path = self.spool_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(list(self._pending.values()), f)
+        os.replace(tmp_path, self.spool_path)
+
+    # --- Worker ---
+    def _work(self):
+        while not self._stopped:
+            try:
+                message = self._queue.get(timeout=IDLE_TIMEOUT)
+            except queue.Empty:
+                self._close()
+                continue
+            if message is None or self._stopped:
+                break
+            with self._lock:
+                if self._pending.get(message["id"]) is not message or message.get("status") != "pending":
+                    continue  # already sent, rejected or parked
+                relogin, self._relogin = self._relogin, False
+            if relogin:
+                self._close()
+            try:
+                self._deliver(message)
+            except Exception as e:
+                print(f"Sending email failed: {e}")
+                self._close()
+                self._failed(message, e)
+            else:
+                self._finish(message, True)
+        self._close()
+
+    def _deliver(self, message):
+        msg = EmailMessage()
+        msg.set_content(message["body"])
+        msg["Subject"] = message["subject"]
+        msg["From"] = self.user
+        msg["To"] = message["to"]
+        try:
+            self._session().send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The warm session went stale; one fresh connection before counting a failure
+            self._close()
+            self._session().send_message(msg)
+
+    def _failed(self, message, error):
+        with self._lock:
+            message["attempts"] += 1
+            attempts = message["attempts"]
+            if _is_permanent(error):
+                message["status"] = "rejected"
+                self._pending.pop(message["id"], None)
+            elif attempts >= MAX_ATTEMPTS:
+                message["status"] = "failed"  # parked; kept in the spool
+            self._save_spool()
+        if message["status"] != "pending":
+            self._report(message, False)
+            return
+        delay = RETRY_BACKOFF * 2 ** (attempts - 1)
+        timer = threading.Timer(delay, self._queue.put, args=(message,))
+        timer.daemon = True
+        timer.start()
+
+    def _finish(self, message, sent):
+        with self._lock:
+            message["status"] = "sent"
+            self._pending.pop(message["id"], None)
+            self._save_spool()
+        self._report(message, sent)
+
+    def _report(self, message, sent):
+        if self.on_result is not None:
+            try:
+                self.on_result(message, sent)
+            except Exception as e:
+                print(f"Outbox callback error: {e}")
+
+    def _session(self):
+        if self._server is None:
+            if self.ssl:
+                server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+            else:
+                server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            server.ehlo_or_helo_if_needed()
+            if server.has_extn("auth"):
+                server.login(self.user, self.password)
+            self._server = server
+        return self._server
+
+    def _close(self):
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                pass
+
+
+def _is_permanent(error):
+    """True for SMTP refusals that retrying can't fix (5xx), apart from a failed login."""
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False  # fixed by correcting the credentials, so keep the mail
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return isinstance(error, ValueError)  # the message itself can't be built
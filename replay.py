@@ -0,0 +1,346 @@
+"""
+Headless replay harness for the whole command pipeline.
+
+Runs a scripted corpus through the real code (voice_input queue -> main.dispatch
+-> action workers -> tts worker) with no microphone, speakers,
+browser or internet. pyttsx3, webbrowser.open and subprocess.Popen are
+replaced by in-process fakes; web searches go to a local HTTP stand-in, and
+mail to the local IMAP and SMTP socket stand-ins in tests/stand_ins.py, so
+the real sessions in mail.py and outbox.py are exercised. Reports commands/sec, per-intent latency percentiles, per-stage
+timings from the metrics module and memory growth, and can compare a run
+against a saved baseline:
+
+    python replay.py benchmarks/corpus.txt --repeat 50 --json run.json
+    python replay.py benchmarks/corpus.txt --repeat 50 --compare run.json
+
+Corpus format: one command per line; `|` separates the follow-up answers of
+the same dialog ("send an email to bob | lunch | see you at noon"). A part
+ending in .wav is read with sr.AudioFile, cut by the VAD and recognized on a
+RecognizerPool; with the default stub backend its transcript is taken from
+the .txt file next to it. Blank lines and lines starting with # are skipped.
+"""
+import os
+import sys
+import json
+import time
+import types
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ASR_WAIT = 30  # seconds to wait for a command to come out of recognition
+
+SEARCH_PAGE = (
+    "<html><head><title>results</title></head><body>"
+    '<div class="BNeawe iBp4i AP7Wnd"><div>42</div></div>'
+    '<div class="BNeawe tAd8D AP7Wnd">Sunny</div>'
+    + "".join(f'<div class="g"><a href="https://example.com/{i}">Result {i}</a>'
+              f'<div class="BNeawe s3v9rd AP7Wnd">Snippet {i}</div></div>' for i in range(300))
+    + "</body></html>"
+).encode("utf-8")
+
+
+# --- Fakes and stand-ins ---
+class FakeEngine:
+    """pyttsx3 engine that only counts what it was asked to say."""
+
+    speech_delay = 0.0
+
+    def __init__(self, *args, **kwargs):
+        self.spoken = 0
+        self._pending = []
+        self._props = {"voice": "replay", "rate": 150, "voices": []}
+
+    def getProperty(self, name):
+        return self._props.get(name)
+
+    def setProperty(self, name, value):
+        self._props[name] = value
+
+    def connect(self, topic, callback):
+        pass
+
+    def say(self, text):
+        self._pending.append(text)
+
+    def save_to_file(self, text, path):
+        pass
+
+    def stop(self):
+        self._pending.clear()
+
+    def runAndWait(self):
+        if self.speech_delay and self._pending:
+            time.sleep(self.speech_delay)
+        self.spoken += len(self._pending)
+        self._pending.clear()
+
+
+# Counters only, so long runs measure the assistant's memory, not the fakes'
+class FakePopen:
+    launched = 0
+
+    def __init__(self, args, *rest, **kwargs):
+        FakePopen.launched += 1
+        self.returncode = 0
+
+    def poll(self):
+        return 0
+
+    def wait(self, timeout=None):
+        return 0
+
+
+class _SearchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(SEARCH_PAGE)))
+        self.end_headers()
+        self.wfile.write(SEARCH_PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_search_stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SearchHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/search"
+
+
+def start_mail_stand_ins():
+    """Local IMAP and SMTP servers; returns the "gmail" config section that points at them."""
+    from tests.stand_ins import ImapStandIn, SmtpStandIn
+    # Counters only, like the other fakes
+    imap = ImapStandIn(record=False).start()
+    for uid in range(101, 106):
+        imap.deliver(uid, f"Report {uid}")
+    smtp = SmtpStandIn(record=False).start()
+    return {
+        "email": "jarvis@example.com", "app_password": "replay",
+        "imap_host": "127.0.0.1", "imap_port": imap.server_address[1], "imap_ssl": False,
+        "smtp_host": "127.0.0.1", "smtp_port": smtp.server_address[1], "smtp_ssl": False,
+    }
+
+
+def install_fakes(workdir, follow_up_timeout):
+    """Swap every device and network endpoint for a fake or stand-in; returns the modules in use."""
+    import webbrowser
+    sys.modules["pyttsx3"] = types.SimpleNamespace(init=FakeEngine)
+    webbrowser.open = lambda url, *args, **kwargs: FakePopen(["browser", url])
+
+    import tts
+    tts.CACHE_DIR = os.path.join(workdir, "tts_cache")
+    tts.VOICE_CACHE_PATH = os.path.join(workdir, "voice.json")
+
+    import outbox
+    outbox.SPOOL_PATH = os.path.join(workdir, "outbox_spool.json")
+
+    # A copy of config.json with fake credentials, and app paths that exist
+    import config
+    with open(config.CONFIG_PATH, "r") as f:
+        raw = json.load(f)
+    raw["applications"] = {name: {"linux": sys.executable} for name in raw.get("applications", {})}
+    raw["gmail"] = start_mail_stand_ins()
+    config.CONFIG_PATH = os.path.join(workdir, "config.json")
+    with open(config.CONFIG_PATH, "w") as f:
+        json.dump(raw, f)
+    config.SYSTEM = "linux"
+
+    import main
+    import actions
+    actions.SYSTEM = "linux"
+    actions.subprocess = types.SimpleNamespace(Popen=FakePopen)
+    actions.SEARCH_URL = start_search_stand_in()
+    main.FOLLOW_UP_TIMEOUT = actions.FOLLOW_UP_TIMEOUT = follow_up_timeout
+    return main, actions, tts
+
+
+# --- Replay ---
+def load_corpus(path):
+    base = os.path.dirname(os.path.abspath(path))
+    items = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = [p.strip() for p in line.split("|")]
+            items.append([os.path.join(base, p) if p.endswith(".wav") else p for p in parts])
+    return items
+
+
+class Replayer:
+    def __init__(self, args):
+        import metrics
+        import voice_input
+        self.workdir = tempfile.mkdtemp(prefix="jarvis-replay-")
+        self.main, self.actions, self.tts = install_fakes(self.workdir, args.follow_up_timeout)
+        FakeEngine.speech_delay = args.speech_delay
+        os.chdir(self.workdir)  # file actions create/delete files here
+        metrics.ENABLED = True
+        self.metrics = metrics
+        self.voice_input = voice_input
+        self.cold = args.cold
+        self.backend = args.backend
+        self.workers = args.workers
+        self.pool = None  # created on the first .wav, so text-only corpora don't need speech_recognition
+        self.transcripts = {}
+
+    def _get_pool(self):
+        if self.pool is None:
+            from asr import RecognizerPool, make_backend
+            if self.backend == "stub":
+                backend = make_backend("stub", text=lambda audio: self.transcripts.pop(id(audio), ""))
+            else:
+                backend = make_backend(self.backend, timeout=ASR_WAIT)
+            self.pool = RecognizerPool(backend, self.voice_input._on_recognized,
+                                       workers=self.workers, timeout=ASR_WAIT)
+        return self.pool
+
+    def _feed_wav(self, path, trace_id):
+        import speech_recognition as sr
+        from vad import utterances
+        pool = self._get_pool()
+        transcript = ""
+        sidecar = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(sidecar):
+            with open(sidecar, "r") as f:
+                transcript = f.read().strip()
+        with sr.AudioFile(path) as source:
+            for audio in utterances(source):
+                self.transcripts[id(audio)] = transcript
+                pool.submit(audio, trace_id)
+                trace_id = None  # only the first utterance opens the trace
+
+    def run_item(self, parts):
+        """Feed one dialog and wait until it is handled and spoken; returns the intent."""
+        if self.cold:
+            self.actions.ANSWER_CACHE.clear()
+            self.actions.WEATHER_CACHE.clear()
+        for i, part in enumerate(parts):
+            trace_id = self.metrics.start() if i == 0 else None
+            if part.endswith(".wav"):
+                self._feed_wav(part, trace_id)
+            else:
+                if trace_id is not None:
+                    self.metrics.mark(trace_id, "recognized")
+                self.voice_input.submit_command(part, trace_id)
+        command = self.voice_input.listen_command(timeout=ASR_WAIT)
+        if command is None:
+            return None
+        intent, _ = self.actions.config.current().router.resolve(command)
+        self.main.dispatch(command)
+        self.main.get_executor().wait_idle(ASR_WAIT)
+        self.tts.wait_idle(ASR_WAIT)
+        while self.voice_input.listen_command(timeout=0) is not None:
+            pass  # unused follow-ups must not leak into the next item
+        return intent or "unknown"
+
+    def run(self, corpus, repeat):
+        # One untimed pass so imports, sessions and caches are warm
+        for parts in corpus:
+            self.run_item(parts)
+        tracemalloc.start()
+        memory = []  # traced bytes after each pass
+        latencies = {}
+        start = time.perf_counter()
+        count = 0
+        for _ in range(repeat):
+            for parts in corpus:
+                t0 = time.perf_counter()
+                intent = self.run_item(parts)
+                elapsed = time.perf_counter() - t0
+                latencies.setdefault(intent or "unrecognized", []).append(elapsed)
+                count += 1
+            memory.append(tracemalloc.get_traced_memory()[0])
+        total = time.perf_counter() - start
+        tracemalloc.stop()
+        return report(count, total, latencies, memory, len(corpus), self.metrics.snapshot())
+
+
+def _percentiles(values):
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+    return {"count": len(values), "p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+def report(count, seconds, latencies, memory, per_pass, stages):
+    try:
+        import resource
+        max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        max_rss_kb = None
+    return {
+        "commands": count,
+        "seconds": seconds,
+        "commands_per_sec": count / seconds if seconds else 0.0,
+        "intents": {intent: _percentiles(values) for intent, values in sorted(latencies.items())},
+        "stages": stages,
+        "memory": {
+            "traced_start_bytes": memory[0],
+            "traced_end_bytes": memory[-1],
+            # Growth after the first timed pass, when the rolling windows are still filling
+            "growth_bytes_per_1k_commands": (memory[-1] - memory[0]) * 1000 / max(count - per_pass, 1),
+            "per_repeat_bytes": memory,
+            "max_rss_kb": max_rss_kb,
+        },
+    }
+
+
+def print_report(result, baseline=None):
+    def delta(new, old):
+        return f" ({(new - old) / old * 100:+.1f}%)" if old else ""
+
+    rate = result["commands_per_sec"]
+    line = f"{result['commands']} commands in {result['seconds']:.2f} s: {rate:.1f} commands/s"
+    if baseline:
+        line += delta(rate, baseline["commands_per_sec"])
+    print(line)
+    print(f"{'intent':<22}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for intent, s in result["intents"].items():
+        row = f"{intent:<22}{s['count']:>6}{s['p50'] * 1e3:>10.2f}{s['p95'] * 1e3:>10.2f}{s['p99'] * 1e3:>10.2f}"
+        old = (baseline or {}).get("intents", {}).get(intent)
+        if old:
+            row += f"   p50{delta(s['p50'], old['p50'])} p95{delta(s['p95'], old['p95'])}"
+        print(row)
+    mem = result["memory"]
+    print(f"memory: {mem['traced_start_bytes'] / 1024:.0f} KB -> {mem['traced_end_bytes'] / 1024:.0f} KB traced, "
+          f"{mem['growth_bytes_per_1k_commands'] / 1024:+.1f} KB per 1k commands, max RSS {mem['max_rss_kb']} KB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("corpus", help="text file with one command (dialog) per line")
+    parser.add_argument("--repeat", type=int, default=10, help="timed passes over the corpus")
+    parser.add_argument("--backend", default="stub", help="recognizer for .wav parts (see asr.BACKENDS)")
+    parser.add_argument("--workers", type=int, default=2, help="recognition workers")
+    parser.add_argument("--speech-delay", type=float, default=0.0, help="seconds the fake TTS takes per utterance")
+    parser.add_argument("--follow-up-timeout", type=float, default=0.2, help="wait for follow-up answers")
+    parser.add_argument("--cold", action="store_true", help="clear answer caches before every command")
+    parser.add_argument("--json", help="write the report here")
+    parser.add_argument("--compare", help="baseline report to compare against")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    result = Replayer(args).run(corpus, args.repeat)
+    print_report(result, baseline)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
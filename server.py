@@ -0,0 +1,313 @@
+"""
+Headless server mode: one Jarvis process shared by several local clients.
+
+Commands come in over HTTP on localhost and go through the same intent
+router and actions as the microphone loop in main.py:
+
+    POST /command   {"text": "weather in paris", "session": "...", "audio": false}   (Content-Type: application/json)
+    POST /command?session=...&audio=1   with a WAV clip as the body (Content-Type: audio/wav)
+
+The reply is JSON: {"session", "transcript", "intent", "replies": [...],
+"awaiting": bool} plus "audio" (base64 WAV per reply) when audio was asked
+for. A request without a known session starts a new one; pass the returned
+id back to answer follow-up prompts such as send_email's subject and body,
+which are kept per session instead of going through the microphone queue.
+WAV clips are recognized on a process pool, so several clients can upload
+at once without queueing behind one core. Run from the repo root:
+
+    python server.py [--port 8765] [--recognizer google] [--processes N]
+
+There is no authentication, so the server only answers loopback clients
+that talk to it directly: requests must be JSON or WAV (never a form or
+text/plain body a web page could send without a CORS preflight), must not
+carry an Origin header, and must name 127.0.0.1 or localhost in Host,
+which also defeats DNS rebinding.
+"""
+import json
+import time
+import queue
+import uuid
+import base64
+import argparse
+import ipaddress
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import config
+import metrics
+import tts
+import voice_input
+from asr import recognize_clip
+from actions import resolve_command, run_action, answer_question, prefetch_answer
+
+HOST = "127.0.0.1"  # local clients only; there is no authentication
+PORT = 8765
+MAX_BODY_BYTES = 10 * 1024 * 1024
+JSON_TYPES = ("application/json",)
+WAV_TYPES = ("audio/wav", "audio/x-wav", "audio/wave")
+LOCAL_HOSTNAMES = ("127.0.0.1", "localhost", "[::1]")
+RECOGNITION_TIMEOUT = 15
+SYNTHESIS_TIMEOUT = 30
+REQUEST_TIMEOUT = 60  # longest a request waits for its dialog to reply or ask something
+SESSION_FOLLOW_UP_TIMEOUT = 300  # remote clients get longer than FOLLOW_UP_TIMEOUT to answer
+SESSION_IDLE_TIMEOUT = 30 * 60
+
+
+# --- Sessions ---
+class _Inbox(queue.Queue):
+    """A session's follow-up answers; tells the session when its dialog is waiting for one."""
+
+    def __init__(self, session):
+        super().__init__()
+        self.session = session
+
+    def get(self, block=True, timeout=None):
+        if not block or timeout == 0:
+            return super().get(block=False)
+        session = self.session
+        with session.cond:
+            session.waiting = True
+            session.cond.notify_all()
+        try:
+            return super().get(timeout=SESSION_FOLLOW_UP_TIMEOUT)
+        finally:
+            with session.cond:
+                session.waiting = False
+
+
+class Session:
+    """
+    One client's conversation. Each command runs as a dialog on its own
+    thread, with listen_command() reading from the session inbox and speak()
+    collected into the session's replies (see tts.capture).
+    """
+
+    def __init__(self, session_id):
+        self.id = session_id
+        self.cond = threading.Condition()
+        self.lock = threading.Lock()  # one request per session at a time
+        self.inbox = _Inbox(self)
+        self.replies = []
+        self.busy = False
+        self.waiting = False
+        self.last_used = time.monotonic()
+
+    def append(self, item):
+        # tts.capture sink: called with (text, priority) from the dialog thread
+        with self.cond:
+            self.replies.append(item[0])
+
+    def handle(self, command, trace_id=None):
+        """Run or continue a dialog; returns (replies, awaiting) once it finishes or asks something."""
+        with self.cond:
+            self.last_used = time.monotonic()
+            # A dialog left running by an earlier, timed-out request goes first
+            self.cond.wait_for(lambda: self.waiting or not self.busy, REQUEST_TIMEOUT)
+            if self.waiting:
+                # The dialog is blocked in listen_command(); this is its answer
+                self.waiting = False
+                self.inbox.put((command, trace_id))
+            else:
+                self.busy = True
+                threading.Thread(target=self._dialog, args=(command, trace_id),
+                                 name=f"session-{self.id[:8]}", daemon=True).start()
+            self.cond.wait_for(lambda: self.waiting or not self.busy, REQUEST_TIMEOUT)
+            replies, self.replies = self.replies, []
+            return replies, self.waiting
+
+    def _dialog(self, command, trace_id):
+        metrics.activate(trace_id)
+        try:
+            with voice_input.command_source(self.inbox), tts.capture(self):
+                intent, slots = resolve_command(command)
+                if intent is None:
+                    # Look the answer up while the client decides whether to search
+                    threading.Thread(target=prefetch_answer, args=(command,), daemon=True).start()
+                handled = run_action(intent, slots, command)
+                metrics.mark(trace_id, "action_done")
+                if intent is None and not handled:
+                    # Only then has run_action asked whether to search for it
+                    response = voice_input.listen_command(timeout=SESSION_FOLLOW_UP_TIMEOUT)
+                    if response and "yes" in response.lower():
+                        answer_question(command)
+        except Exception as e:
+            print(f"Session {self.id} dialog failed: {e}")
+        finally:
+            metrics.activate(None)
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(session_id):
+    """Return the session with this id, or a new one if it is unknown or missing."""
+    now = time.monotonic()
+    with _sessions_lock:
+        for stale in [s for s in _sessions.values() if now - s.last_used > SESSION_IDLE_TIMEOUT]:
+            del _sessions[stale.id]
+        session = _sessions.get(session_id) if session_id else None
+        if session is None:
+            session = Session(uuid.uuid4().hex)
+            _sessions[session.id] = session
+        session.last_used = now
+        return session
+
+
+# --- HTTP ---
+class JarvisHandler(BaseHTTPRequestHandler):
+    server_version = "Jarvis"
+    recognizer = "google"
+    pool = None  # ProcessPoolExecutor for WAV recognition, set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _refusal(self, content_type):
+        """Return (status, reason) if this request must not be served, else None."""
+        if self.headers.get("Origin") is not None:
+            # Browsers add Origin to cross-site requests; scripts and devices don't need it
+            return 403, "requests from web pages are not accepted"
+        extra = self.server.extra_hostnames
+        if extra is not None:
+            port = self.server.server_port
+            allowed = {f"{name}:{port}" for name in LOCAL_HOSTNAMES + extra}
+            if (self.headers.get("Host") or "").lower() not in allowed:
+                return 403, "unexpected Host header"
+        if content_type not in JSON_TYPES + WAV_TYPES:
+            return 415, "body must be application/json or audio/wav"
+        return None
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/command":
+            self._reply(404, {"error": "not found"})
+            return
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        refusal = self._refusal(content_type)
+        if refusal is not None:
+            self._reply(refusal[0], {"error": refusal[1]})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._reply(413, {"error": "request too large"})
+            return
+        body = self.rfile.read(length)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        trace_id = metrics.start()
+        if content_type in WAV_TYPES:
+            try:
+                text = self.pool.submit(recognize_clip, body, self.recognizer,
+                                        RECOGNITION_TIMEOUT).result(RECOGNITION_TIMEOUT)
+            except FutureTimeout:
+                self._reply(504, {"error": "recognition timed out"})
+                return
+            except Exception as e:
+                self._reply(400, {"error": f"could not recognize audio: {e}"})
+                return
+        else:
+            try:
+                params.update(json.loads(body or b"{}"))
+            except (ValueError, TypeError):
+                self._reply(400, {"error": "body must be a JSON object"})
+                return
+            text = params.get("text") or ""
+        for field, value in (("text", text), ("session", params.get("session"))):
+            if value is not None and not isinstance(value, str):
+                self._reply(400, {"error": f'"{field}" must be a string'})
+                return
+        metrics.mark(trace_id, "recognized")
+
+        session = get_session(params.get("session"))
+        payload = {"session": session.id, "transcript": text, "replies": [], "awaiting": False}
+        if text.strip():
+            with session.lock:
+                # A follow-up answer is not a command of its own
+                payload["intent"] = None if session.waiting else config.current().router.resolve(text)[0]
+                replies, awaiting = session.handle(text.lower(), trace_id)
+            payload["replies"] = replies
+            payload["awaiting"] = awaiting
+        if str(params.get("audio", "")).lower() in ("1", "true", "yes"):
+            payload["audio"] = [_encode(tts.synthesize(reply, SYNTHESIS_TIMEOUT)) for reply in payload["replies"]]
+        self._reply(200, payload)
+
+
+def _encode(data):
+    return base64.b64encode(data).decode("ascii") if data else None
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def make_server(host=HOST, port=PORT):
+    """
+    Bind the HTTP server. Host headers naming `host` are accepted as well as
+    the loopback names; on a wildcard address (0.0.0.0, ::) any Host is.
+    """
+    httpd = ThreadingHTTPServer((host, port), JarvisHandler)
+    httpd.daemon_threads = True
+    try:
+        wildcard = ipaddress.ip_address(host).is_unspecified
+    except ValueError:
+        wildcard = False
+    httpd.extra_hostnames = None if wildcard else (host.lower(),)
+    return httpd
+
+
+def serve(host=HOST, port=PORT, recognizer="google", processes=None, allow_remote=False):
+    if not _is_loopback(host):
+        if not allow_remote:
+            raise SystemExit(f"Refusing to listen on {host}: the server has no authentication. "
+                             "Pass --allow-remote to do it anyway.")
+        print(f"WARNING: listening on {host} without authentication; anyone who can reach it can run commands.")
+    metrics.configure(config.current().raw.get("metrics"))
+    config.start_watching()
+    tts.warm_up()
+    JarvisHandler.recognizer = recognizer
+    JarvisHandler.pool = ProcessPoolExecutor(max_workers=processes)
+    httpd = make_server(host, port)
+    print(f"Jarvis server listening on http://{host}:{httpd.server_port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        JarvisHandler.pool.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=HOST, help="address to bind (keep it local)")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--recognizer", default="google", help="backend for WAV clips (see asr.BACKENDS)")
+    parser.add_argument("--processes", type=int, help="recognition processes (default: one per core)")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="allow a non-loopback --host (there is no authentication)")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.recognizer, args.processes, args.allow_remote)
+
+
+if __name__ == "__main__":
+    main()
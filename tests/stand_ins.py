@@ -0,0 +1,186 @@
+"""
+Local stand-ins for the mail servers: small socket servers speaking just
+enough IMAP4rev1 for mail.ImapMailbox and enough ESMTP for outbox.Outbox
+(in the spirit of aiosmtpd's Debugging handler, stdlib only). Used by the
+mail tests and by replay.py, which points the assistant at them through
+the host/port keys of config.json's "gmail" section.
+"""
+import re
+import threading
+import socketserver
+
+_UID_FETCH_RE = re.compile(r"UID FETCH ([\d,]+) ")
+REJECTED = "nobody@invalid.example"  # the SMTP stand-in refuses this recipient with a 550
+
+
+class _ImapHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True  # replies go out line by line
+
+    def send(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections.append(self.connection)
+        self.send("* OK IMAP4rev1 stand-in ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if self.connection in server.hung:
+                continue  # half-open: the client hears nothing back
+            tag, _, command = line.decode().strip().partition(" ")
+            with server.lock:
+                if server.record:
+                    server.commands.append(command)
+                verb = command.split(" ", 1)[0].upper()
+                if verb == "CAPABILITY":
+                    self.send("* CAPABILITY IMAP4rev1")
+                elif verb == "LOGIN":
+                    server.logins += 1
+                elif verb in ("SELECT", "EXAMINE"):
+                    self.send(f"* {len(server.messages)} EXISTS")
+                    self.send(f"* OK [UIDVALIDITY {server.uidvalidity}] UIDs valid")
+                elif command.upper().startswith("UID SEARCH"):
+                    unseen = sorted(uid for uid, (_, _, seen) in server.messages.items() if not seen)
+                    self.send("* SEARCH " + " ".join(str(u) for u in unseen))
+                elif command.upper().startswith("UID FETCH"):
+                    for seq, uid in enumerate(_UID_FETCH_RE.match(command).group(1).split(","), 1):
+                        sender, subject, _ = server.messages[int(uid)]
+                        header = f"From: {sender}\r\nSubject: {subject}\r\n\r\n".encode()
+                        self.wfile.write(f"* {seq} FETCH (UID {uid} BODY[HEADER.FIELDS (FROM SUBJECT DATE)] "
+                                         f"{{{len(header)}}}\r\n".encode() + header + b")\r\n")
+                elif verb == "LOGOUT":
+                    self.send("* BYE")
+                    self.send(f"{tag} OK done")
+                    return
+            self.send(f"{tag} OK done")
+
+
+class ImapStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, record=True):
+        super().__init__(("127.0.0.1", 0), _ImapHandler)
+        self.record = record  # keep every command, for fetched()
+        self.lock = threading.Lock()
+        self.connections = []
+        self.hung = set()
+        self.commands = []
+        self.logins = 0
+        self.uidvalidity = 1
+        self.messages = {}  # uid -> (sender, subject, seen)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="imap-stand-in", daemon=True).start()
+        return self
+
+    def deliver(self, uid, subject, seen=False):
+        self.messages[uid] = (f"sender{uid}@example.com", subject, seen)
+
+    def fetched(self):
+        """UIDs asked for in each UID FETCH so far, and forget them."""
+        with self.lock:
+            batches = [m.group(1).split(",") for m in map(_UID_FETCH_RE.match, self.commands) if m]
+            self.commands = []
+        return [[int(uid) for uid in batch] for batch in batches]
+
+    def drop_connections(self):
+        """Close every client socket, like a server timing out an idle session."""
+        with self.lock:
+            for conn in self.connections:
+                try:
+                    conn.shutdown(2)
+                except OSError:
+                    pass
+            self.connections = []
+
+    def hang_connections(self):
+        """Stop answering on every open session, like a NAT that forgot it; new ones still work."""
+        with self.lock:
+            self.hung.update(self.connections)
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True  # replies go out line by line
+
+    def send(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            server.sockets.append(self.connection)
+        self.send("220 stand-in ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if self.connection in server.hung:
+                continue  # half-open: the client hears nothing back
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.send("250-stand-in")
+                self.send("250 AUTH PLAIN")
+            elif verb == "AUTH":
+                with server.lock:
+                    server.logins += 1
+                self.send("235 authenticated")
+            elif verb == "MAIL":
+                with server.lock:
+                    server.mail_attempts += 1
+                    failing = server.fail_mail > 0
+                    if failing:
+                        server.fail_mail -= 1
+                self.send("451 try again later" if failing else "250 ok")
+            elif verb == "RCPT":
+                self.send("550 no such user" if REJECTED in command else "250 ok")
+            elif verb == "DATA":
+                self.send("354 go ahead")
+                data = []
+                while True:
+                    line = self.rfile.readline()
+                    if line in (b".\r\n", b""):
+                        break
+                    data.append(line)
+                with server.lock:
+                    server.sent += 1
+                    if server.record:
+                        server.delivered.append(b"".join(data).decode())
+                self.send("250 queued")
+            elif verb == "QUIT":
+                self.send("221 bye")
+                return
+            else:
+                self.send("250 ok")  # RSET, NOOP
+
+
+class SmtpStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, record=True):
+        super().__init__(("127.0.0.1", 0), _SmtpHandler)
+        self.record = record  # keep every delivered message in `delivered`
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.sockets = []
+        self.hung = set()
+        self.logins = 0
+        self.mail_attempts = 0
+        self.fail_mail = 0  # answer this many MAIL FROMs with a 451
+        self.sent = 0
+        self.delivered = []
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="smtp-stand-in", daemon=True).start()
+        return self
+
+    def hang_connections(self):
+        """Stop answering on every open session, like a NAT that forgot it; new ones still work."""
+        with self.lock:
+            self.hung.update(self.sockets)
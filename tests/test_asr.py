@@ -0,0 +1,78 @@
+"""
+Tests for asr.RecognizerPool over StubBackend: in-order delivery, timeouts
+and phrases with nothing understood.
+
+Run from the repo root:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import time
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asr import RecognizerPool, StubBackend
+
+
+class RecognizerPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.results = []
+        self.finished = []  # phrases in the order recognition finished
+        self._cond = threading.Condition()
+
+    def recognize(self, audio):
+        # The stand-in "audio" is (text, seconds the round-trip takes)
+        text, delay = audio
+        time.sleep(delay)
+        with self._cond:
+            self.finished.append(text)
+            self._cond.notify_all()
+        return text
+
+    def on_result(self, text, context):
+        with self._cond:
+            self.results.append((text, context))
+            self._cond.notify_all()
+
+    def make_pool(self, workers=3, timeout=10):
+        return RecognizerPool(StubBackend(text=self.recognize), self.on_result,
+                              workers=workers, timeout=timeout)
+
+    def wait_for(self, predicate, timeout=5):
+        with self._cond:
+            self.assertTrue(self._cond.wait_for(predicate, timeout),
+                            f"results {self.results}, finished {self.finished}")
+
+    def test_results_delivered_in_capture_order(self):
+        pool = self.make_pool()
+        for i, phrase in enumerate([("one", 0.3), ("two", 0.0), ("three", 0.1)]):
+            pool.submit(phrase, context=i)
+        self.wait_for(lambda: len(self.results) == 3)
+        self.assertEqual(self.finished, ["two", "three", "one"])
+        self.assertEqual(self.results, [("one", 0), ("two", 1), ("three", 2)])
+
+    def test_timed_out_phrase_is_skipped(self):
+        pool = self.make_pool(timeout=0.2)
+        pool.submit(("too late", 0.6))
+        pool.submit(("next", 0.0))
+        self.wait_for(lambda: self.results)
+        self.assertEqual(self.results, [("next", None)])
+        # Its late result is discarded, not delivered after the fact
+        self.wait_for(lambda: "too late" in self.finished)
+        time.sleep(0.1)
+        self.assertEqual(self.results, [("next", None)])
+
+    def test_unrecognized_phrase_is_skipped(self):
+        pool = self.make_pool()
+        for phrase in [("first", 0.1), ("", 0.0), ("last", 0.0)]:
+            pool.submit(phrase)
+        self.wait_for(lambda: len(self.results) == 2)
+        time.sleep(0.1)
+        self.assertEqual([text for text, _ in self.results], ["first", "last"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Tests for audio_cache.AudioCache and cached playback in tts, with a
+stand-in `aplay` on PATH.
+
+Run from the repo root:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tts
+from audio_cache import AudioCache, cache_key
+
+# Copies the clip it is given on stdin ("-") to $APLAY_OUT, like aplay would play it
+FAKE_APLAY = """#!/bin/sh
+for arg in "$@"; do last="$arg"; done
+if [ "$last" = "-" ]; then cat > "$APLAY_OUT"; else cp "$last" "$APLAY_OUT"; fi
+"""
+
+
+class AudioCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def add(self, cache, key, data):
+        tmp_path = cache.temp_path(key)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        cache.add(key, tmp_path)
+
+    def test_read_is_served_from_memory(self):
+        cache = AudioCache(self.dir)
+        self.add(cache, "hello", b"RIFF hello")
+        self.assertEqual(cache.read("hello"), b"RIFF hello")
+        with mock.patch("builtins.open", side_effect=AssertionError("read from disk")):
+            self.assertEqual(cache.read("hello"), b"RIFF hello")
+
+    def test_disk_and_memory_caps_evict_least_recently_used(self):
+        cache = AudioCache(self.dir, max_bytes=20, memory_bytes=10)
+        self.add(cache, "a", b"a" * 10)
+        self.add(cache, "b", b"b" * 10)
+        cache.read("a")
+        cache.read("b")  # the memory tier only has room for one
+        self.assertEqual(list(cache._memory), ["b"])
+        cache.path("a")
+        self.add(cache, "c", b"c" * 10)
+        self.assertIsNone(cache.path("b"))
+        self.assertIsNotNone(cache.path("a"))
+        self.assertNotIn("b", cache._memory)
+
+    def test_order_survives_a_restart(self):
+        cache = AudioCache(self.dir, max_bytes=20)
+        self.add(cache, "a", b"a" * 10)
+        self.add(cache, "b", b"b" * 10)
+        os.utime(cache.path("a"), (1, 1))
+        os.utime(os.path.join(self.dir, "b.wav"), (2, 2))
+        reopened = AudioCache(self.dir, max_bytes=20)
+        self.add(reopened, "c", b"c" * 10)
+        self.assertIsNone(reopened.path("a"))
+        self.assertIsNotNone(reopened.path("b"))
+
+
+@unittest.skipIf(sys.platform.startswith(("win", "darwin")), "plays through aplay")
+class CachedPlaybackTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        bin_dir = os.path.join(self.dir, "bin")
+        os.mkdir(bin_dir)
+        aplay = os.path.join(bin_dir, "aplay")
+        with open(aplay, "w") as f:
+            f.write(FAKE_APLAY)
+        os.chmod(aplay, 0o755)
+        self.out = os.path.join(self.dir, "played.wav")
+        env = {"PATH": bin_dir + os.pathsep + os.environ.get("PATH", ""), "APLAY_OUT": self.out}
+        for patcher in (mock.patch.dict(os.environ, env),
+                        mock.patch.object(tts, "_cache", AudioCache(os.path.join(self.dir, "cache")))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_memory_hit_is_streamed_to_the_player(self):
+        key = cache_key("hello", tts._voice_id, tts._rate)
+        tmp_path = tts._cache.temp_path(key)
+        with open(tmp_path, "wb") as f:
+            f.write(b"RIFF hello")
+        tts._cache.add(key, tmp_path)
+        tts._cache.read(key)
+        os.remove(os.path.join(tts._cache.directory, key + ".wav"))  # only the memory tier has it now
+        self.assertTrue(tts._play_cached(tts._Utterance("hello", tts._generation)))
+        with open(self.out, "rb") as f:
+            self.assertEqual(f.read(), b"RIFF hello")
+
+    def test_miss_falls_back_to_live_speech(self):
+        self.assertFalse(tts._play_cached(tts._Utterance("never rendered", tts._generation)))
+
+
+if __name__ == "__main__":
+    unittest.main()
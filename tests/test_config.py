@@ -0,0 +1,156 @@
+"""
+Tests for config.py: hot reload of config.json, name matching through
+aliases and the fuzzy index, and validation of the "extractors" section.
+
+Run from the repo root:
+
+    python -m unittest discover tests
+"""
+import os
+import io
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import contextlib
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from config import ConfigError, FuzzyIndex, Settings, validate
+from extract import DEFAULT_RULES
+
+CONDITION = [{"tag": "span", "class": "wob_dc"}]
+RAW = {
+    "applications": {"vs code": "code", "notepad": "notepad.exe"},
+    "websites": {"github": "https://github.com", "youtube": "https://www.youtube.com"},
+    "aliases": {"vscode": "vs code", "code": "vs code"},
+}
+
+
+class HotReloadTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        self.path = os.path.join(tmp, "config.json")
+        self.write(RAW)
+        for name, value in (("CONFIG_PATH", self.path), ("_current", None), ("_rejected_mtime", None)):
+            patcher = mock.patch.object(config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.mtime = os.stat(self.path).st_mtime_ns
+
+    def write(self, raw):
+        with open(self.path, "w") as f:
+            f.write(raw if isinstance(raw, str) else json.dumps(raw))
+
+    def touch(self):
+        # Filesystems with coarse timestamps could otherwise keep the old mtime
+        self.mtime += 10 ** 9
+        os.utime(self.path, ns=(self.mtime, self.mtime))
+
+    def reload(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            changed = config.reload_if_changed()
+        return changed, out.getvalue()
+
+    def test_swaps_on_mtime_change(self):
+        before = config.current()
+        self.assertEqual(self.reload(), (False, ""))
+        self.assertIs(config.current(), before)
+        self.write({**RAW, "websites": {**RAW["websites"], "reddit": "https://www.reddit.com"}})
+        self.touch()
+        self.assertTrue(self.reload()[0])
+        after = config.current()
+        self.assertIsNot(after, before)
+        self.assertEqual(after.site_url("reddit"), "https://www.reddit.com")
+        self.assertIsNone(before.site_url("reddit"))  # never modified in place
+
+    def test_broken_edit_keeps_previous_settings_and_is_reported_once(self):
+        before = config.current()
+        self.write('{"applications": ')
+        self.touch()
+        changed, output = self.reload()
+        self.assertFalse(changed)
+        self.assertIn("Keeping the previous config", output)
+        self.assertEqual(self.reload(), (False, ""))
+        self.assertIs(config.current(), before)
+        # A valid shape but a bad value is rejected the same way
+        self.write({**RAW, "aliases": {"browser": "chrome"}})
+        self.touch()
+        changed, output = self.reload()
+        self.assertFalse(changed)
+        self.assertIn('alias "browser"', output)
+        self.assertIs(config.current(), before)
+        # Fixing it picks the edit up
+        self.write(RAW)
+        self.touch()
+        self.assertTrue(self.reload()[0])
+
+
+class MatchTest(unittest.TestCase):
+    def setUp(self):
+        self.settings = Settings(RAW)
+
+    def test_exact_names_and_aliases(self):
+        self.assertEqual(self.settings.match("Notepad"), ("application", "notepad"))
+        self.assertEqual(self.settings.match("vscode"), ("application", "vs code"))
+        self.assertEqual(self.settings.match("github"), ("website", "github"))
+        self.assertEqual(self.settings.app_path("VSCode"), "code")
+
+    def test_near_misses(self):
+        self.assertEqual(self.settings.match("vs cold"), ("application", "vs code"))
+        self.assertEqual(self.settings.match("git hub"), ("website", "github"))
+        self.assertEqual(self.settings.match("you tube"), ("website", "youtube"))
+
+    def test_nothing_close(self):
+        self.assertEqual(self.settings.match("spreadsheet"), (None, None))
+
+    def test_min_score_cutoff(self):
+        name, score = FuzzyIndex(["github"], min_score=0).lookup("git hub")
+        self.assertEqual(name, "github")
+        self.assertGreaterEqual(score, config.FUZZY_MIN_SCORE)
+        self.assertEqual(FuzzyIndex(["github"], min_score=score + 0.01).lookup("git hub"), (None, 0.0))
+        self.assertEqual(FuzzyIndex(["github"], min_score=score).lookup("git hub"), ("github", score))
+
+
+class GmailTest(unittest.TestCase):
+    def test_mail_server_overrides(self):
+        validate({"gmail": {"email": "a@example.com", "imap_host": "127.0.0.1", "imap_port": 1143,
+                            "imap_ssl": False, "smtp_port": 2525}})
+        for gmail in ({"imap_port": "993"}, {"smtp_host": 1}, {"smtp_ssl": "no"}, {"imap_port": True}):
+            with self.assertRaises(ConfigError, msg=gmail):
+                validate({"gmail": gmail})
+
+
+class ExtractorsTest(unittest.TestCase):
+    def test_override_keeps_other_default_fields(self):
+        extractors = Settings({"extractors": {"weather": {"condition": CONDITION}}}).extractors
+        self.assertEqual(extractors["weather"]["condition"], CONDITION)
+        self.assertEqual(extractors["weather"]["temperature"], DEFAULT_RULES["weather"]["temperature"])
+        self.assertEqual(extractors["answer"], DEFAULT_RULES["answer"])
+
+    def test_bad_extractors_are_rejected(self):
+        bad = [
+            {"answr": {"answer": CONDITION}},
+            {"weather": []},
+            {"weather": {"humidity": CONDITION}},
+            {"weather": {"condition": []}},
+            {"weather": {"condition": {"tag": "span", "class": "wob_dc"}}},
+            {"weather": {"condition": ["wob_dc"]}},
+            {"weather": {"condition": [{"tag": "span"}]}},
+            {"weather": {"condition": [{"tag": 1, "class": "wob_dc"}]}},
+        ]
+        for extractors in bad:
+            with self.assertRaises(ConfigError, msg=extractors):
+                validate({"extractors": extractors})
+
+    def test_shipped_config_is_valid(self):
+        self.assertEqual(config.load().extractors, DEFAULT_RULES)
+
+
+if __name__ == "__main__":
+    unittest.main()
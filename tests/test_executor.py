@@ -0,0 +1,74 @@
+"""
+Tests for executor.ActionExecutor: ordered replies, timeouts and cancel().
+
+Run from the repo root:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import time
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tts
+from executor import ActionExecutor
+
+
+def _say_after(text, seconds, started=None):
+    if started is not None:
+        started.set()
+    time.sleep(seconds)
+    tts.speak(text)
+
+
+class ActionExecutorTest(unittest.TestCase):
+    def setUp(self):
+        self.spoken = []
+        self.timeouts = []
+        # Only the sequencer's deliveries reach here; speech inside actions is captured
+        real_speak = tts.speak
+
+        def speak(text, priority=tts.PRIORITY_NORMAL, wait=False, interrupt_current=False):
+            if getattr(tts._local, "sink", None) is not None:
+                return real_speak(text, priority, wait, interrupt_current)
+            self.spoken.append(text)
+
+        patcher = mock.patch.object(tts, "speak", speak)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.executor = ActionExecutor(workers=2, on_timeout=self.timeouts.append)
+
+    def test_replies_in_submission_order(self):
+        self.executor.submit("slow", _say_after, "slow 1", 0.2)
+        self.executor.submit("fast", _say_after, "fast 2", 0.0)
+        self.assertTrue(self.executor.wait_idle(5))
+        self.assertEqual(self.spoken, ["slow 1", "fast 2"])
+
+    def test_timed_out_action_is_skipped(self):
+        self.executor.submit("slow", _say_after, "too late", 0.5, timeout=0.1)
+        self.executor.submit("fast", _say_after, "next", 0.0)
+        self.assertTrue(self.executor.wait_idle(5))
+        self.assertEqual(self.spoken, ["next"])
+        self.assertEqual(self.timeouts, ["slow"])
+
+    def test_cancel_drops_finished_but_undelivered_replies(self):
+        started = threading.Event()
+        self.executor.submit("slow", _say_after, "slow 1", 0.3, started)
+        self.executor.submit("fast", _say_after, "fast 2", 0.0)
+        started.wait(5)
+        time.sleep(0.1)  # "fast" is done, waiting behind "slow"
+        self.assertEqual(self.executor.cancel(), 2)
+        self.assertTrue(self.executor.wait_idle(5))
+        time.sleep(0.4)  # let "slow" finish on its worker
+        self.assertEqual(self.spoken, [])
+
+    def test_cancel_with_nothing_pending(self):
+        self.assertEqual(self.executor.cancel(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
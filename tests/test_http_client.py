@@ -0,0 +1,133 @@
+"""
+Tests for http_client against a local http.server stand-in.
+
+Run from the repo root:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import time
+import threading
+import unittest
+from unittest import mock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+import http_client
+from http_client import TTLCache, normalize_query
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            server.ports.append(self.client_address[1])
+            hits = server.hits[self.path]
+        if self.path.startswith("/slow"):
+            time.sleep(1.0)
+            status = 200
+        elif self.path.startswith("/flaky"):
+            status = 503 if hits == 1 else 200
+        elif self.path.startswith("/broken"):
+            status = 500
+        else:
+            status = 200
+        body = b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except OSError:
+            pass  # the client gave up on /slow
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpClientTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+        cls.server.daemon_threads = True
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.hits = {}
+        self.server.ports = []
+        http_client._session = None
+
+    def tearDown(self):
+        if http_client._session is not None:
+            http_client._session.close()
+            http_client._session = None
+
+    def test_read_timeout(self):
+        start = time.monotonic()
+        with self.assertRaises(requests.RequestException):
+            http_client.get(self.base + "/slow", timeout=(1, 0.2))
+        # Every attempt is cut off by the read timeout, not by the 1 s handler
+        self.assertEqual(self.server.hits["/slow"], 1 + http_client.MAX_RETRIES)
+        self.assertLess(time.monotonic() - start, 3)
+
+    def test_retries_on_5xx(self):
+        response = http_client.get(self.base + "/flaky")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.hits["/flaky"], 2)
+
+    def test_retries_are_bounded(self):
+        with self.assertRaises(requests.RequestException):
+            http_client.get(self.base + "/broken")
+        self.assertEqual(self.server.hits["/broken"], 1 + http_client.MAX_RETRIES)
+
+    def test_session_is_reused(self):
+        self.assertIs(http_client.get_session(), http_client.get_session())
+        for _ in range(3):
+            http_client.get(self.base + "/ok", params={"q": "hello"})
+        # One kept-alive connection, so every request came from the same port
+        self.assertEqual(len(set(self.server.ports)), 1)
+
+
+class TTLCacheTest(unittest.TestCase):
+    def test_entries_expire(self):
+        cache = TTLCache(maxsize=4, ttl=10)
+        with mock.patch("http_client.time.monotonic", return_value=100.0):
+            cache.set("weather", "sunny", ttl=1)
+            cache.set("answer", 42)
+        with mock.patch("http_client.time.monotonic", return_value=101.5):
+            self.assertIsNone(cache.get("weather"))
+            self.assertEqual(cache.get("answer"), 42)
+        with mock.patch("http_client.time.monotonic", return_value=110.5):
+            self.assertIsNone(cache.get("answer"))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_similar_queries_share_a_key(self):
+        self.assertEqual(normalize_query("What is  the Tallest mountain?"),
+                         normalize_query("what is the tallest mountain"))
+
+
+if __name__ == "__main__":
+    unittest.main()
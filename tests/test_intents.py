@@ -0,0 +1,60 @@
+"""
+Tests for intents.build_router.
+
+Run from the repo root:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intents import build_router, tokenize
+
+CONFIG = {
+    "applications": {"chrome": "/usr/bin/google-chrome-stable", "vs code": "/usr/bin/code"},
+    "websites": {"github": "https://github.com"},
+    "aliases": {"browser": "chrome"},
+}
+
+
+class BuildRouterTest(unittest.TestCase):
+    def setUp(self):
+        self.router = build_router(CONFIG)
+
+    def intent(self, command):
+        return self.router.resolve(command)[0]
+
+    def test_cancel_only_as_the_whole_command(self):
+        for command in ("stop", "cancel", "never mind", "stop it", "cancel that", "jarvis stop"):
+            self.assertEqual(self.intent(command), "cancel", command)
+        for command in ("cancel my meeting", "stop the music", "what is a bus stop"):
+            self.assertNotEqual(self.intent(command), "cancel", command)
+
+    def test_exact_names_and_aliases(self):
+        self.assertEqual(self.router.resolve("open chrome"), ("open_application", {"app_name": "chrome"}))
+        self.assertEqual(self.router.resolve("open browser"), ("open_application", {"app_name": "chrome"}))
+        self.assertEqual(self.router.resolve("go to github"), ("open_website", {"site_name": "github"}))
+
+    def test_word_boundaries(self):
+        self.assertEqual(self.intent("hi"), "greet")
+        self.assertNotEqual(self.intent("open this chrome thing"), "greet")
+
+    def test_unknown_names_go_to_the_fuzzy_rule(self):
+        self.assertEqual(self.router.resolve("open vs cold"), ("open_by_name", {"name": "vs cold"}))
+        self.assertEqual(self.intent("open file notes.txt"), "open_file")
+
+    def test_sentence_punctuation(self):
+        self.assertEqual(tokenize("Open my-file.txt, don't."), ["open", "my-file.txt", "don't"])
+        self.assertEqual(self.router.resolve("hi."), ("greet", {}))
+        self.assertEqual(self.router.resolve("Open Chrome."), ("open_application", {"app_name": "chrome"}))
+        self.assertEqual(self.intent("Stop!"), "cancel")
+        self.assertEqual(self.router.resolve("open file notes.txt."), ("open_file", {"file_name": "notes.txt"}))
+        self.assertEqual(self.router.resolve("What's the weather in Paris?"),
+                         ("get_weather", {"location": "paris"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
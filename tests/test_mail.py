@@ -0,0 +1,87 @@
+"""
+Tests for mail.ImapMailbox against a local IMAP stand-in speaking just
+enough IMAP4rev1 over a real socket for imaplib (see stand_ins.py).
+
+Run from the repo root:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mail import ImapMailbox
+from tests.stand_ins import ImapStandIn
+
+
+class ImapMailboxTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ImapStandIn().start()
+        for uid in range(101, 106):
+            self.server.deliver(uid, f"Report {uid}")
+        self.mailbox = ImapMailbox("jarvis@example.com", "secret", host="127.0.0.1",
+                                   port=self.server.server_address[1], ssl=False, timeout=0.5)
+
+    def tearDown(self):
+        self.mailbox.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_newest_headers_in_one_batch(self):
+        count, latest = self.mailbox.unseen(limit=3)
+        self.assertEqual(count, 5)
+        self.assertEqual([h.subject for h in latest], ["Report 105", "Report 104", "Report 103"])
+        self.assertEqual(latest[0].sender, "sender105@example.com")
+        # Headers only, without setting \Seen
+        self.assertTrue(any("BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE)]" in c for c in self.server.commands))
+        self.assertEqual(self.server.fetched(), [[105, 104, 103]])
+
+    def test_later_checks_fetch_only_new_headers(self):
+        self.mailbox.unseen(limit=3)
+        self.server.fetched()
+        self.server.deliver(106, "Report 106")
+        self.server.deliver(104, "Report 104", seen=True)
+        count, latest = self.mailbox.unseen(limit=3)
+        self.assertEqual(count, 5)
+        self.assertEqual([h.uid for h in latest], [106, 105, 103])
+        self.assertEqual(self.server.fetched(), [[106]])
+        # Nothing new: no FETCH at all, and still the one login
+        self.mailbox.unseen(limit=3)
+        self.assertEqual(self.server.fetched(), [])
+        self.assertEqual(self.server.logins, 1)
+
+    def test_uidvalidity_change_refetches(self):
+        self.mailbox.unseen(limit=2)
+        self.server.fetched()
+        # The mailbox was rebuilt: same UIDs now name different messages
+        self.server.uidvalidity = 2
+        self.server.deliver(105, "Rebuilt 105")
+        self.server.deliver(104, "Rebuilt 104")
+        _, latest = self.mailbox.unseen(limit=2)
+        self.assertEqual([h.subject for h in latest], ["Rebuilt 105", "Rebuilt 104"])
+        self.assertEqual(self.server.fetched(), [[105, 104]])
+
+    def test_reconnects_after_server_drops_session(self):
+        self.mailbox.unseen(limit=1)
+        self.server.drop_connections()
+        count, latest = self.mailbox.unseen(limit=1)
+        self.assertEqual(count, 5)
+        self.assertEqual(latest[0].uid, 105)
+        self.assertEqual(self.server.logins, 2)
+
+    def test_reconnects_when_server_stops_answering(self):
+        self.mailbox.unseen(limit=1)
+        self.server.hang_connections()
+        start = time.monotonic()
+        count, latest = self.mailbox.unseen(limit=1)
+        self.assertLess(time.monotonic() - start, 3)
+        self.assertEqual(count, 5)
+        self.assertEqual(latest[0].uid, 105)
+        self.assertEqual(self.server.logins, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Tests for outbox.Outbox against a local SMTP stand-in (see stand_ins.py).
+
+Run from the repo root:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import outbox
+from outbox import Outbox
+from tests.stand_ins import SmtpStandIn, REJECTED
+
+def _free_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class OutboxTest(unittest.TestCase):
+    def setUp(self):
+        self.server = SmtpStandIn().start()
+        self.port = self.server.server_address[1]
+        self.spool = os.path.join(tempfile.mkdtemp(), "spool.json")
+        self.results = []
+        self.outboxes = []
+        self._reported = threading.Condition()
+        patcher = mock.patch.object(outbox, "RETRY_BACKOFF", 0.05)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for box in self.outboxes:
+            box.stop(5)
+        self.server.shutdown()
+        self.server.server_close()
+
+    def on_result(self, message, sent):
+        with self._reported:
+            self.results.append((message["to"], sent, message.get("status")))
+            self._reported.notify_all()
+
+    def wait_results(self, count, timeout=10):
+        with self._reported:
+            self.assertTrue(self._reported.wait_for(lambda: len(self.results) >= count, timeout),
+                            f"only got {self.results}")
+
+    def make_outbox(self, port=None):
+        box = Outbox("jarvis@example.com", "secret", on_result=self.on_result,
+                     spool_path=self.spool, host="127.0.0.1", port=port or self.port, ssl=False,
+                     timeout=0.5)
+        self.outboxes.append(box)
+        return box
+
+    def test_reuses_one_warm_session(self):
+        box = self.make_outbox()
+        for i in range(3):
+            box.send(f"friend{i}@example.com", "lunch", "see you at noon")
+        self.wait_results(3)
+        self.assertEqual([sent for _, sent, _ in self.results], [True] * 3)
+        self.assertEqual(len(self.server.delivered), 3)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.logins, 1)
+        self.assertFalse(os.path.exists(self.spool))
+
+    def test_spool_survives_restart(self):
+        with mock.patch.object(outbox, "RETRY_BACKOFF", 60):
+            first = self.make_outbox(port=_free_port())  # nothing listening
+            first.send("bob@example.com", "lunch", "see you at noon")
+            deadline = time.monotonic() + 5
+            while first.pending()[0]["attempts"] < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            first.stop(5)
+        with open(self.spool, "r") as f:
+            self.assertEqual([m["to"] for m in json.load(f)], ["bob@example.com"])
+
+        self.make_outbox()  # the next start picks the spool up
+        self.wait_results(1)
+        self.assertEqual(self.results, [("bob@example.com", True, "sent")])
+        self.assertIn("see you at noon", self.server.delivered[0])
+        self.assertFalse(os.path.exists(self.spool))
+
+    def test_retries_with_backoff(self):
+        self.server.fail_mail = 2
+        box = self.make_outbox()
+        start = time.monotonic()
+        box.send("bob@example.com", "lunch", "see you at noon")
+        self.wait_results(1)
+        self.assertEqual(self.results, [("bob@example.com", True, "sent")])
+        self.assertEqual(self.server.mail_attempts, 3)
+        # 0.05 s, then 0.1 s
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_permanent_rejection_is_dropped(self):
+        box = self.make_outbox()
+        box.send(REJECTED, "lunch", "see you at noon")
+        self.wait_results(1)
+        self.assertEqual(self.results, [(REJECTED, False, "rejected")])
+        self.assertEqual(self.server.mail_attempts, 1)
+        self.assertEqual(box.pending(), [])
+        self.assertFalse(os.path.exists(self.spool))
+
+    def test_outage_parks_mail_until_next_send(self):
+        self.server.fail_mail = 1000
+        with mock.patch.object(outbox, "MAX_ATTEMPTS", 2):
+            box = self.make_outbox()
+            box.send("bob@example.com", "lunch", "see you at noon")
+            self.wait_results(1)
+            self.assertEqual(self.results, [("bob@example.com", False, "failed")])
+            with open(self.spool, "r") as f:
+                self.assertEqual([m["status"] for m in json.load(f)], ["failed"])
+
+            self.server.fail_mail = 0
+            box.send("alice@example.com", "dinner", "see you at eight")
+            self.wait_results(3)
+        sent = sorted(to for to, ok, _ in self.results if ok)
+        self.assertEqual(sent, ["alice@example.com", "bob@example.com"])
+        self.assertFalse(os.path.exists(self.spool))
+
+    def test_stale_session_times_out_and_reconnects(self):
+        box = self.make_outbox()
+        box.send("bob@example.com", "one", "first")
+        self.wait_results(1)
+        self.server.hang_connections()
+        box.send("bob@example.com", "two", "second")
+        self.wait_results(2, timeout=5)
+        self.assertEqual([sent for _, sent, _ in self.results], [True, True])
+        self.assertEqual(self.server.connections, 2)
+
+    def test_new_credentials_log_in_again(self):
+        box = self.make_outbox()
+        box.send("bob@example.com", "one", "first")
+        self.wait_results(1)
+        box.set_credentials("other@example.com", "secret2")
+        box.send("bob@example.com", "two", "second")
+        self.wait_results(2)
+        self.assertEqual(self.server.logins, 2)
+        self.assertIn("From: other@example.com", self.server.delivered[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Tests for server.py: the request checks in JarvisHandler, which stand in
+for authentication (only direct loopback clients sending JSON or WAV get
+in), and the per-session dialogs behind them.
+
+Run from the repo root:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import json
+import threading
+import http.client
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+import actions
+from actions import FALLBACK_PROMPT, GREETING, SUBJECT_PROMPT, STOPPED
+
+
+class _ServerTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.httpd = server.make_server("127.0.0.1", 0)
+        threading.Thread(target=cls.httpd.serve_forever, daemon=True).start()
+        cls.port = cls.httpd.server_port
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+
+    def post(self, body=b"{}", content_type="application/json", host=None, **headers):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        if host is not None:
+            headers["Host"] = host
+        if content_type is not None:
+            headers["Content-Type"] = content_type
+        conn.request("POST", "/command", body=body, headers=headers)
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        conn.close()
+        return response.status, payload
+
+    def command(self, text, session=None):
+        status, payload = self.post(json.dumps({"text": text, "session": session}).encode())
+        self.assertEqual(status, 200)
+        return payload
+
+
+class JarvisHandlerTest(_ServerTestCase):
+    def test_json_command_from_loopback(self):
+        status, payload = self.post(json.dumps({"text": ""}).encode())
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["replies"], [])
+        self.assertEqual(self.post(host=f"localhost:{self.port}")[0], 200)
+
+    def test_simple_request_content_types_are_refused(self):
+        # What a cross-site <form> or fetch() can send without a CORS preflight
+        for content_type in ("text/plain", "application/x-www-form-urlencoded", "multipart/form-data", None):
+            status, _ = self.post(b'{"text": "open notepad"}', content_type=content_type)
+            self.assertEqual(status, 415, content_type)
+
+    def test_requests_from_web_pages_are_refused(self):
+        status, _ = self.post(Origin="http://evil.example")
+        self.assertEqual(status, 403)
+
+    def test_other_host_names_are_refused(self):
+        # A DNS-rebound page still names its own host
+        for host in ("evil.example:%d" % self.port, "localhost", "127.0.0.1:1"):
+            status, _ = self.post(host=host)
+            self.assertEqual(status, 403, host)
+
+    def test_non_object_json_is_a_bad_request(self):
+        self.assertEqual(self.post(b"[1, 2]")[0], 400)
+
+    def test_non_string_fields_are_a_bad_request(self):
+        for fields in ({"text": 5}, {"text": ["hello"]}, {"text": "hello", "session": ["x"]},
+                       {"text": "hello", "session": {"id": 1}}):
+            status, payload = self.post(json.dumps(fields).encode())
+            self.assertEqual(status, 400, fields)
+            self.assertIn("must be a string", payload["error"])
+
+    def test_non_loopback_host_needs_allow_remote(self):
+        self.assertTrue(server._is_loopback("127.0.0.1"))
+        self.assertTrue(server._is_loopback("::1"))
+        self.assertTrue(server._is_loopback("localhost"))
+        self.assertFalse(server._is_loopback("0.0.0.0"))
+        self.assertFalse(server._is_loopback("192.168.1.20"))
+        with self.assertRaises(SystemExit):
+            server.serve("0.0.0.0", 0)
+
+
+class SessionTest(_ServerTestCase):
+    def setUp(self):
+        # The fallback looks the answer up in the background; keep that offline
+        patcher = mock.patch.object(server, "prefetch_answer", lambda query: None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_failed_action_does_not_wait_for_an_answer(self):
+        first = self.command("open file does_not_exist_here.txt")
+        self.assertFalse(first["awaiting"])
+        self.assertIn("can't seem to find the file", first["replies"][0])
+        second = self.command("hello", first["session"])
+        self.assertEqual(second["session"], first["session"])
+        self.assertEqual(second["intent"], "greet")
+        self.assertEqual(second["replies"], [GREETING])
+
+    def test_unknown_command_asks_whether_to_search(self):
+        first = self.command("zzz qqq")
+        self.assertTrue(first["awaiting"])
+        self.assertEqual(first["replies"], [FALLBACK_PROMPT])
+        # The answer belongs to the dialog, and closes it
+        second = self.command("no", first["session"])
+        self.assertIsNone(second["intent"])
+        self.assertEqual((second["replies"], second["awaiting"]), ([], False))
+        self.assertEqual(self.command("hello", first["session"])["replies"], [GREETING])
+
+    def test_stop_during_email_dialog_sends_nothing(self):
+        sent = []
+        with mock.patch.object(actions, "send_email", lambda *args: sent.append(args) or True):
+            for answers in (["stop"], ["lunch", "cancel"]):
+                payload = self.command("send an email to bob")
+                self.assertEqual((payload["replies"], payload["awaiting"]), ([SUBJECT_PROMPT], True))
+                for answer in answers:
+                    payload = self.command(answer, payload["session"])
+                self.assertEqual((payload["replies"], payload["awaiting"]), ([STOPPED], False))
+            payload = self.command("send an email to bob")
+            self.command("lunch", payload["session"])
+            self.command("see you at noon", payload["session"])
+        self.assertEqual(sent, [("bob", "lunch", "see you at noon")])
+
+
+if __name__ == "__main__":
+    unittest.main()
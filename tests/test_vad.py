@@ -0,0 +1,112 @@
+"""
+Tests for vad: utterances cut from a WAV file through sr.AudioFile, the
+same path the microphone takes, and the adaptive noise floor.
+
+Run from the repo root:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import wave
+import array
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+
+from vad import VoiceActivityDetector, UtteranceSegmenter, frame_energy, utterances
+
+RATE = 16000
+WIDTH = 2
+FRAME = RATE * 30 // 1000  # samples per 30 ms frame
+QUIET = 20  # room noise
+LOUD = 8000  # speech
+
+
+def _tone(frames, amplitude):
+    """Alternating +/-amplitude samples, so every frame's RMS energy is exactly `amplitude`."""
+    samples = array.array("h", [amplitude, -amplitude] * (frames * FRAME // 2))
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples.tobytes()
+
+
+class UtterancesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def write_wav(self, *parts):
+        path = os.path.join(self.tmp, "command.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(WIDTH)
+            f.setframerate(RATE)
+            f.writeframes(b"".join(_tone(frames, amplitude) for frames, amplitude in parts))
+        return path
+
+    def frame_levels(self, audio):
+        data = audio.frame_data
+        return [round(frame_energy(data[i:i + FRAME * WIDTH], WIDTH))
+                for i in range(0, len(data), FRAME * WIDTH)]
+
+    def test_silence_tone_silence_tone(self):
+        # Defaults: 500 ms calibration (16 frames), 10 frames of pre-roll,
+        # 20 of hangover, speech after 3 voiced frames
+        path = self.write_wav((20, QUIET), (17, LOUD), (40, QUIET), (10, LOUD))
+        with sr.AudioFile(path) as source:
+            found = list(utterances(source))
+        self.assertEqual(len(found), 2)
+        first, second = (self.frame_levels(audio) for audio in found)
+        # Pre-roll, the whole tone, then the hangover that ended it
+        self.assertEqual(first, [QUIET] * 10 + [LOUD] * 17 + [QUIET] * 20)
+        # The file ends mid-utterance: flush() hands it over without a hangover
+        self.assertEqual(second, [QUIET] * 10 + [LOUD] * 10)
+        self.assertEqual((found[0].sample_rate, found[0].sample_width), (RATE, WIDTH))
+
+    def test_silence_only(self):
+        path = self.write_wav((60, QUIET))
+        with sr.AudioFile(path) as source:
+            self.assertEqual(list(utterances(source)), [])
+
+    def test_flush_without_speech(self):
+        segmenter = UtteranceSegmenter(RATE, WIDTH)
+        for _ in range(20):
+            self.assertIsNone(segmenter.feed(_tone(1, QUIET)))
+        self.assertIsNone(segmenter.flush())
+
+    def test_max_utterance_cap(self):
+        path = self.write_wav((20, QUIET), (60, LOUD))
+        with sr.AudioFile(path) as source:
+            found = list(utterances(source, max_utterance_s=1.5))  # 50 frames
+        # Cut at the cap; the rest of the tone is a new utterance
+        self.assertEqual([len(self.frame_levels(a)) for a in found], [50, 30])
+
+
+class VoiceActivityDetectorTest(unittest.TestCase):
+    def test_noise_floor_follows_a_louder_room(self):
+        vad = VoiceActivityDetector(WIDTH)
+        vad.calibrate(_tone(1, 100))
+        self.assertTrue(vad.is_speech(_tone(1, 600)))
+        # The room gets noisier (below 3x the floor, so not speech) ...
+        for _ in range(100):
+            self.assertFalse(vad.is_speech(_tone(1, 250)))
+        self.assertAlmostEqual(vad.noise_floor, 250, delta=5)
+        # ... so what was speech before is now just noise
+        self.assertFalse(vad.is_speech(_tone(1, 600)))
+
+    def test_speech_barely_moves_the_floor(self):
+        vad = VoiceActivityDetector(WIDTH)
+        vad.calibrate(_tone(1, 100))
+        for _ in range(50):
+            self.assertTrue(vad.is_speech(_tone(1, LOUD)))
+        # At the non-speech rate it would be past 7000 by now
+        self.assertLess(vad.noise_floor, 600)
+
+
+if __name__ == "__main__":
+    unittest.main()
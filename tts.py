@@ -1,50 +1,349 @@
-import pyttsx3
+import os
+import json
+import time
+import wave
 import platform
+import subprocess
 import threading
+import heapq
+import itertools
+from collections import deque
+from contextlib import contextmanager
+from audio_cache import AudioCache, cache_key
+import metrics
 
 _engine = None
 _voice_set = False
+_voice_id = None
+_rate = None
+_ready = threading.Event()  # set once the engine and the audio cache are set up
+
+SYSTEM = platform.system().lower()
+
+# Rendered-audio cache for phrases Jarvis says again and again
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tts_cache")
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+CACHE_MEMORY_BYTES = 8 * 1024 * 1024
+
+# Lower number = spoken first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+MAX_QUEUED = 8  # queued utterances beyond this are dropped, least important first
+
+# Voice picked on a previous run, so startup can skip enumerating voices
+VOICE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".voice_cache.json")
+
+def _load_cached_voice():
+    try:
+        with open(VOICE_CACHE_PATH, "r") as f:
+            return json.load(f).get("voice")
+    except (OSError, ValueError):
+        return None
+
+def _save_cached_voice(voice_id):
+    try:
+        with open(VOICE_CACHE_PATH, "w") as f:
+            json.dump({"voice": voice_id}, f)
+    except OSError:
+        pass
+
+def _select_voice(engine):
+    """Set a female voice if available; the choice is cached between runs."""
+    cached = _load_cached_voice()
+    if cached:
+        try:
+            engine.setProperty('voice', cached)
+            return
+        except Exception:
+            pass  # voice was uninstalled; pick again
+
+    female_voice = None
+    for v in engine.getProperty('voices'):
+        # Many platforms mark female with 'female', Windows with 'Zira', etc.
+        if ('female' in v.name.lower() or 'zira' in v.id.lower() or 'female' in str(v.gender).lower()):
+            female_voice = v.id
+            break
+
+    if female_voice:
+        print(f"Selected female voice: {female_voice}")
+        engine.setProperty('voice', female_voice)
+    else:
+        print("No female voice found, using default.")
+    _save_cached_voice(engine.getProperty('voice'))
 
 # Singleton pattern to reuse the same engine
 def _get_engine():
-    global _engine, _voice_set
+    global _engine, _voice_set, _voice_id, _rate
     if _engine is None:
-        _engine = pyttsx3.init()
-        # Set female voice if available
-        voices = _engine.getProperty('voices')
-        print("Available voices:")
-        for voice in voices:
-            print(f" - {voice.name} ({voice.id})")
-
-        female_voice = None
-        for v in voices:
-            # Many platforms mark female with 'female', Windows with 'Zira', etc.
-            if ('female' in v.name.lower() or 'zira' in v.id.lower() or 'female' in str(v.gender).lower()):
-                female_voice = v.id
-                break
-        
-        if female_voice:
-            print(f"Selected female voice: {female_voice}")
-            _engine.setProperty('voice', female_voice)
-        else:
-            print("No female voice found, using default.")
-
+        import pyttsx3  # slow to import and initialize; done on the TTS thread
+        engine = pyttsx3.init()
+        _select_voice(engine)
         _voice_set = True
         # Optional: Tweak properties
-        _engine.setProperty('rate', 150) # Slower speech rate
+        engine.setProperty('rate', 150) # Slower speech rate
+        _voice_id = engine.getProperty('voice')
+        _rate = engine.getProperty('rate')
+        _engine = engine
 
     return _engine
 
-def speak(text):
+# --- Speech worker ---
+# pyttsx3 engines are not thread-safe, so a single worker thread owns the
+# engine and everything else talks to it through this queue.
+class _Utterance:
+    __slots__ = ("text", "generation", "done", "trace_id")
+
+    def __init__(self, text, generation, trace_id=None):
+        self.text = text
+        self.generation = generation
+        self.done = threading.Event()
+        self.trace_id = trace_id
+
+_queue = []  # heap of (priority, seq, utterance)
+_cond = threading.Condition()
+_seq = itertools.count()
+_generation = 0  # bumped by interrupt(); older utterances are stale
+_current = None
+_worker = None
+_cache = None
+_renders = deque()  # (text, Event or None) to pre-render while the worker is idle
+
+def _on_word(name, location, length):
+    # Runs inside runAndWait on the worker thread, where stop() is safe
+    current = _current
+    if current is not None and current.generation != _generation:
+        _engine.stop()
+
+def _wav_seconds(path):
+    try:
+        with wave.open(path, "rb") as f:
+            return f.getnframes() / float(f.getframerate())
+    except (OSError, wave.Error, ZeroDivisionError):
+        return None
+
+def _play_winsound(utterance, path):
+    import winsound
+    seconds = _wav_seconds(path)
+    if seconds is None:
+        return False
+    # Asynchronous, so the loop below can cut it off on barge-in
+    winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC | winsound.SND_NODEFAULT)
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if utterance.generation != _generation:
+            winsound.PlaySound(None, winsound.SND_PURGE)
+            break
+        time.sleep(0.05)
+    return True
+
+def _feed(proc, data):
+    try:
+        proc.stdin.write(data)
+        proc.stdin.close()
+    except (OSError, ValueError):
+        pass  # the player was cut off or never started playing
+
+def _play_cached(utterance):
+    """Play a cached rendering of the utterance; False if there is none or playback failed."""
+    key = cache_key(utterance.text, _voice_id, _rate)
+    if SYSTEM not in ("windows", "darwin"):
+        # aplay reads the clip from stdin, so a hit in the cache's memory tier skips the disk
+        data = _cache.read(key)
+        if data is None:
+            return False
+        player = ["aplay", "-q", "-"]
+    else:
+        # winsound can't play from memory asynchronously, and afplay needs a file
+        path = _cache.path(key)
+        if path is None:
+            return False
+        if SYSTEM == "windows":
+            try:
+                return _play_winsound(utterance, path)
+            except RuntimeError:
+                return False  # no sound device; fall back to live speech
+        data = None
+        player = ["afplay", path]
+    try:
+        proc = subprocess.Popen(player, stdin=subprocess.PIPE if data is not None else None)
+    except OSError:
+        return False  # no command-line player; fall back to live speech
+    if data is not None:
+        # Written from its own thread so a long clip can still be cut off below
+        threading.Thread(target=_feed, args=(proc, data), daemon=True).start()
+    while True:
+        try:
+            proc.wait(timeout=0.05)
+            # No device or device busy: say it live rather than lose it
+            return proc.returncode == 0
+        except subprocess.TimeoutExpired:
+            if utterance.generation != _generation:
+                proc.terminate()
+                return True
+
+def _render(engine, text):
+    key = cache_key(text, _voice_id, _rate)
+    if _cache.path(key) is not None:
+        return
+    tmp_path = _cache.temp_path(key)
+    engine.save_to_file(text, tmp_path)
+    engine.runAndWait()
+    if os.path.exists(tmp_path) and os.path.getsize(tmp_path) > 0:
+        _cache.add(key, tmp_path)
+
+def _worker_loop():
+    global _current, _cache
+    try:
+        engine = _get_engine()
+        engine.connect('started-word', _on_word)
+    except Exception as e:
+        # Keep draining the queue so speak(wait=True) callers aren't stuck
+        print(f"TTS engine unavailable: {e}")
+        engine = None
+    try:
+        _cache = AudioCache(CACHE_DIR, CACHE_MAX_BYTES, CACHE_MEMORY_BYTES)
+    except OSError as e:
+        print(f"TTS cache disabled: {e}")
+    # Only now, so synthesize() never sees a started engine without its cache
+    _ready.set()
+    while True:
+        with _cond:
+            while not _queue and not (_renders and _cache):
+                _cond.wait()
+            if not _queue:
+                text, rendered = _renders.popleft()
+            else:
+                text = None
+                _, _, utterance = heapq.heappop(_queue)
+                if utterance.generation != _generation:
+                    utterance.done.set()
+                    _cond.notify_all()
+                    continue
+                _current = utterance
+        if text is not None:
+            # Speech always goes first; renders only run while idle
+            try:
+                _render(engine, text)
+            except Exception as e:
+                print(f"TTS render error: {e}")
+            if rendered is not None:
+                rendered.set()
+            continue
+        metrics.mark(utterance.trace_id, "first_audio")
+        try:
+            if not (_cache and _play_cached(utterance)):
+                engine.say(utterance.text)
+                engine.runAndWait()
+        except Exception as e:
+            print(f"TTS error: {e}")
+        finally:
+            with _cond:
+                _current = None
+                _cond.notify_all()
+            utterance.done.set()
+
+def _ensure_worker():
+    global _worker
+    with _cond:
+        if _worker is None:
+            _worker = threading.Thread(target=_worker_loop, name="tts-worker", daemon=True)
+            _worker.start()
+
+def warm_up():
+    """Start the speech worker now so engine init and voice selection run in the background."""
+    _ensure_worker()
+
+def wait_ready(timeout=None):
+    """Block until TTS start-up (engine and audio cache) has finished; False on timeout."""
+    return _ready.wait(timeout)
+
+def interrupt():
+    """Barge-in: cut off the utterance being spoken and drop everything queued."""
+    global _generation
+    with _cond:
+        _generation += 1
+        for _, _, utterance in _queue:
+            utterance.done.set()
+        _queue.clear()
+        _cond.notify_all()
+
+def wait_idle(timeout=None):
+    """Block until nothing is queued or being spoken; False on timeout."""
+    with _cond:
+        return _cond.wait_for(lambda: not _queue and _current is None, timeout)
+
+_local = threading.local()
+
+@contextmanager
+def capture(sink):
+    """Collect what speak() is asked to say on this thread into sink as (text, priority)."""
+    previous = getattr(_local, "sink", None)
+    _local.sink = sink
+    try:
+        yield sink
+    finally:
+        _local.sink = previous
+
+def prerender(phrases):
+    """Render phrases into the audio cache in the background, when the worker is idle."""
+    _ensure_worker()
+    with _cond:
+        _renders.extend((text, None) for text in phrases)
+        _cond.notify_all()
+
+def synthesize(text, timeout=None):
+    """Return text rendered as WAV bytes (via the audio cache), or None if TTS can't render it."""
+    _ensure_worker()
+    if not wait_ready(timeout) or _cache is None:
+        return None
+    key = cache_key(text, _voice_id, _rate)
+    data = _cache.read(key)
+    if data is None:
+        rendered = threading.Event()
+        with _cond:
+            _renders.appendleft((text, rendered))
+            _cond.notify_all()
+        if not rendered.wait(timeout):
+            return None
+        data = _cache.read(key)
+    return data
+
+def speak(text, priority=PRIORITY_NORMAL, wait=False, interrupt_current=False):
     """
     Speak text using the best-available (usually female) system voice.
+    Utterances are queued for the speech worker and spoken in priority order.
+    Pass wait=True for prompts that must finish before listening, and
+    interrupt_current=True to cut off whatever is being said first.
     For more natural voices, integrate Google TTS, Coqui TTS, or Amazon Polly!
     """
-    def _speak():
-        engine = _get_engine()
-        engine.say(text)
-        engine.runAndWait()
-    threading.Thread(target=_speak, daemon=True).start()
+    sink = getattr(_local, "sink", None)
+    if sink is not None:
+        # Inside capture(): the caller decides when (and whether) this is said
+        sink.append((text, priority))
+        return
+    _ensure_worker()
+    if interrupt_current:
+        interrupt()
+    with _cond:
+        # Coalesce: the same sentence already waiting in the queue is enough
+        for _, _, queued in _queue:
+            if queued.text == text:
+                utterance = queued
+                break
+        else:
+            utterance = _Utterance(text, _generation, metrics.current())
+            heapq.heappush(_queue, (priority, next(_seq), utterance))
+            if len(_queue) > MAX_QUEUED:
+                # Drop the least important entry, oldest first among equals
+                stale = max(_queue, key=lambda entry: (entry[0], -entry[1]))
+                _queue.remove(stale)
+                heapq.heapify(_queue)
+                stale[2].done.set()
+            _cond.notify_all()
+    if wait:
+        utterance.done.wait()
 
 # To use studio-quality voices, consider implementing with Coqui-TTS, Google Cloud TTS, Azure or Amazon Polly.
 # This file stays clean/simple for now, but can be replaced with those APIs for even higher quality.
\ No newline at end of file
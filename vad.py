@@ -0,0 +1,183 @@
+import sys
+import math
+import array
+import speech_recognition as sr
+
+FRAME_MS = 30
+
+
+def frame_energy(frame, sample_width):
+    """RMS energy of one frame of signed little-endian PCM."""
+    if sample_width == 2:
+        samples = array.array("h", frame)
+        if sys.byteorder == "big":
+            samples.byteswap()
+    else:
+        samples = [int.from_bytes(frame[i:i + sample_width], "little", signed=True)
+                   for i in range(0, len(frame) - sample_width + 1, sample_width)]
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class RingBuffer:
+    """Fixed number of PCM frames in one preallocated bytearray."""
+
+    def __init__(self, frames, frame_bytes):
+        self.capacity = frames
+        self.frame_bytes = frame_bytes
+        self._buf = bytearray(frames * frame_bytes)
+        self._next = 0  # slot the next frame is written to
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, frame):
+        start = self._next * self.frame_bytes
+        self._buf[start:start + self.frame_bytes] = frame
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def last(self, n):
+        """Return the most recent n frames, oldest first, as bytes."""
+        n = min(n, self._count)
+        first = (self._next - n) % self.capacity
+        if first + n <= self.capacity:
+            return bytes(self._buf[first * self.frame_bytes:(first + n) * self.frame_bytes])
+        head = self._buf[first * self.frame_bytes:]
+        tail = self._buf[:self._next * self.frame_bytes]
+        return bytes(head + tail)
+
+
+class VoiceActivityDetector:
+    """
+    Energy-based frame classifier with an adaptive noise floor.
+
+    A frame is speech when its energy is `ratio` times above the noise
+    floor (and above `min_energy`). The floor follows non-speech frames
+    quickly and speech frames very slowly, so it tracks a changing room
+    without being dragged up by the user talking.
+    """
+
+    def __init__(self, sample_width, ratio=3.0, min_energy=150.0,
+                 adapt=0.05, adapt_speech=0.001):
+        self.sample_width = sample_width
+        self.ratio = ratio
+        # min_energy is given for 16-bit audio; scale it to the sample width
+        self.min_energy = min_energy * 256 ** (sample_width - 2)
+        self.adapt = adapt
+        self.adapt_speech = adapt_speech
+        self.noise_floor = None
+
+    def calibrate(self, frame):
+        energy = frame_energy(frame, self.sample_width)
+        if self.noise_floor is None:
+            self.noise_floor = energy
+        else:
+            self.noise_floor += 0.2 * (energy - self.noise_floor)
+
+    def is_speech(self, frame):
+        energy = frame_energy(frame, self.sample_width)
+        if self.noise_floor is None:
+            self.noise_floor = energy
+        speech = energy > max(self.noise_floor * self.ratio, self.min_energy)
+        rate = self.adapt_speech if speech else self.adapt
+        self.noise_floor += rate * (energy - self.noise_floor)
+        return speech
+
+
+class UtteranceSegmenter:
+    """
+    Turn a stream of fixed-size PCM frames into utterances.
+
+    Speech starts after `min_speech_ms` of consecutive voiced frames and
+    includes `pre_roll_ms` of audio before that, so word onsets are not
+    clipped. It ends after `hangover_ms` of silence, or at `max_utterance_s`
+    as a safety cap. Frames are written into one ring buffer, preallocated
+    for the longest utterance plus pre-roll, and copied out once per
+    utterance.
+    """
+
+    def __init__(self, sample_rate, sample_width, frame_ms=FRAME_MS, pre_roll_ms=300,
+                 hangover_ms=600, min_speech_ms=90, max_utterance_s=30, calibration_ms=500,
+                 detector=None):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.frame_bytes = self.frame_samples * sample_width
+        self.pre_roll = max(1, pre_roll_ms // frame_ms)
+        self.hangover = max(1, hangover_ms // frame_ms)
+        self.min_speech = max(1, min_speech_ms // frame_ms)
+        self.max_frames = int(max_utterance_s * 1000 // frame_ms)
+        self.calibration = calibration_ms // frame_ms
+        self.detector = detector or VoiceActivityDetector(sample_width)
+        self.ring = RingBuffer(self.pre_roll + self.max_frames, self.frame_bytes)
+        self._seen = 0
+        self._voiced_run = 0
+        self._in_speech = False
+        self._length = 0
+        self._silence = 0
+
+    def feed(self, frame):
+        """Add one frame; return sr.AudioData when an utterance just ended."""
+        if len(frame) < self.frame_bytes:
+            frame = frame + bytes(self.frame_bytes - len(frame))
+        self.ring.append(frame)
+        self._seen += 1
+        if self._seen <= self.calibration:
+            self.detector.calibrate(frame)
+            return None
+
+        speech = self.detector.is_speech(frame)
+        if not self._in_speech:
+            self._voiced_run = self._voiced_run + 1 if speech else 0
+            if self._voiced_run >= self.min_speech:
+                self._in_speech = True
+                self._length = min(self._voiced_run + self.pre_roll, len(self.ring))
+                self._silence = 0
+            return None
+
+        self._length += 1
+        self._silence = 0 if speech else self._silence + 1
+        if self._silence >= self.hangover or self._length >= self.max_frames:
+            return self._emit()
+        return None
+
+    def flush(self):
+        """Emit whatever utterance is in progress (e.g. at end of file)."""
+        if self._in_speech:
+            return self._emit()
+        return None
+
+    def _emit(self):
+        audio = sr.AudioData(self.ring.last(self._length), self.sample_rate, self.sample_width)
+        self._in_speech = False
+        self._voiced_run = 0
+        self._length = 0
+        self._silence = 0
+        return audio
+
+
+def utterances(source, **kwargs):
+    """
+    Yield sr.AudioData for each utterance read from an open source.
+
+    Works with sr.Microphone for live capture and with sr.AudioFile, so WAV
+    recordings can be pushed through the same path offline:
+
+        with sr.AudioFile("command.wav") as source:
+            for audio in utterances(source):
+                ...
+    """
+    segmenter = UtteranceSegmenter(source.SAMPLE_RATE, source.SAMPLE_WIDTH, **kwargs)
+    while True:
+        frame = source.stream.read(segmenter.frame_samples)
+        if not frame:
+            break
+        audio = segmenter.feed(frame)
+        if audio is not None:
+            yield audio
+    audio = segmenter.flush()
+    if audio is not None:
+        yield audio
@@ -1,41 +1,109 @@
-import speech_recognition as sr
 import threading
 import queue
-
-recognizer = sr.Recognizer()
+import time
+from contextlib import contextmanager
+import metrics
 
 # Shared queue for commands to be handled
 audio_commands = queue.Queue()
 
-LISTEN_TIMEOUT = 7  # seconds before resetting mic
-def _background_listener(q):
-    with sr.Microphone() as source:
-        recognizer.adjust_for_ambient_noise(source)
-        while True:
-            try:
+# Voice-activity detection: how utterances are cut out of the mic stream
+VAD_PRE_ROLL_MS = 300  # audio kept from before speech starts
+VAD_HANGOVER_MS = 600  # silence that ends an utterance
+MAX_UTTERANCE_SECONDS = 30  # safety cap for one command
+RECOGNIZER_BACKEND = "google"  # see asr.BACKENDS
+RECOGNIZER_WORKERS = 2
+RECOGNITION_TIMEOUT = 10  # seconds before a phrase's recognition is abandoned
+
+def _background_listener(backend):
+    # speech_recognition is imported here, off the main thread, so it loads
+    # in parallel with TTS start-up instead of delaying the first prompt
+    import speech_recognition as sr
+    from asr import RecognizerPool, make_backend
+    from vad import utterances
+
+    if backend is None:
+        backend = make_backend(RECOGNIZER_BACKEND, timeout=RECOGNITION_TIMEOUT)
+    pool = RecognizerPool(backend, _on_recognized, workers=RECOGNIZER_WORKERS, timeout=RECOGNITION_TIMEOUT)
+    # Only captures audio; recognition runs on the pool so the mic keeps
+    # being read while a slow round-trip is in flight
+    while True:
+        try:
+            with sr.Microphone() as source:
                 print("Listening (background)...")
-                audio = recognizer.listen(source, phrase_time_limit=LISTEN_TIMEOUT)
-                command = recognizer.recognize_google(audio)
-                print(f"Recognized: {command}")
-                q.put(command.lower())
-            except sr.UnknownValueError:
-                pass  # Ignore and keep listening
-            except sr.RequestError:
-                pass
-            except Exception as e:
-                print(f"Mic error: {e}")
-
-# Start background thread once at module import
-def start_listening():
-    threading.Thread(target=_background_listener, args=(audio_commands,), daemon=True).start()
-
-# Main loop can poll this for new commands
-def listen_command():
+                for audio in utterances(source, pre_roll_ms=VAD_PRE_ROLL_MS,
+                                        hangover_ms=VAD_HANGOVER_MS,
+                                        max_utterance_s=MAX_UTTERANCE_SECONDS):
+                    # The trace is stamped at end of speech and follows the command
+                    pool.submit(audio, metrics.start())
+        except Exception as e:
+            print(f"Mic error: {e}")
+            time.sleep(1)  # don't spin if the device is gone
+
+def _on_recognized(command, trace_id):
+    print(f"Recognized: {command}")
+    metrics.mark(trace_id, "recognized")
+    submit_command(command, trace_id)
+
+def submit_command(command, trace_id=None):
+    """Queue a command as if it had been heard (also used for typed/replayed input)."""
+    audio_commands.put((command.lower(), trace_id))
+
+_listener = None
+
+def start_listening(backend=None):
+    """Open the microphone and start capture + recognition threads (once)."""
+    global _listener
+    if _listener is not None:
+        return
+    _listener = threading.Thread(target=_background_listener, args=(backend,), daemon=True)
+    _listener.start()
+
+FOLLOW_UP_TIMEOUT = 8  # seconds to wait for an answer to a spoken prompt
+
+_local = threading.local()
+
+@contextmanager
+def command_source(commands):
+    """
+    Make listen_command() on this thread read from `commands` (any queue of
+    (command, trace_id) pairs) instead of the microphone queue, so a dialog
+    run for a remote client gets that client's follow-ups.
+    """
+    previous = getattr(_local, "commands", None)
+    _local.commands = commands
+    try:
+        yield commands
+    finally:
+        _local.commands = previous
+
+def take_command(match):
+    """
+    Remove and return the first queued command for which match(command) is
+    true, leaving the others queued in order; None if there is none.
+    """
+    commands = getattr(_local, "commands", None) or audio_commands
+    with commands.mutex:
+        for item in commands.queue:
+            if match(item[0]):
+                commands.queue.remove(item)
+                return item[0]
+    return None
+
+def listen_command(timeout=None):
+    """
+    Block until the next recognized command and return it.
+    With a timeout, return None if nothing was heard in that many seconds;
+    timeout=0 checks the queue without waiting.
+    """
+    commands = getattr(_local, "commands", None) or audio_commands
     try:
-        # Non-blocking get, returns None if queue is empty
-        return audio_commands.get_nowait()
+        if timeout == 0:
+            command, trace_id = commands.get_nowait()
+        else:
+            command, trace_id = commands.get(timeout=timeout)
     except queue.Empty:
         return None
+    metrics.activate(trace_id)
+    return command
 
-# Start listening as soon as this module is loaded
-start_listening()